@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Bulk vs per line set value benchmark
+-------------
+Request 8, 32 and 64 consecutive lines as outputs and compare updating all of
+them with one gpiod_line_set_value call per line against one
+gpiod_line_set_value_bulk call. Lines are driven, so only use a chip and
+first line where nothing is connected.
+"""
+
+import sys, time
+from argparse import *
+from libgpiod import libgpiod, linebulk
+
+
+class bulkbench:
+
+    def __init__(self):
+        """Create library and ffi interfaces.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+
+    def perLine(self, lines, count):
+        """Return seconds for count updates using one call per line.
+        """
+        setValue = self.lib.gpiod_line_set_value
+        start = time.perf_counter()
+        for i in range(count):
+            value = i & 1
+            for line in lines:
+                setValue(line, value)
+        return time.perf_counter() - start
+
+    def bulk(self, bulk, count):
+        """Return seconds for count updates using one bulk call.
+        """
+        values = bulk.values
+        num = len(bulk)
+        patterns = ([0] * num, [1] * num)
+        start = time.perf_counter()
+        for i in range(count):
+            values[0:num] = patterns[i & 1]
+            bulk.setValues()
+        return time.perf_counter() - start
+
+    def main(self, chip, first, count):
+        gpiod_chip = self.lib.gpiod_chip_open_by_number(chip)
+        if gpiod_chip == self.ffi.NULL:
+            print("Unable to open chip %d" % chip)
+            return
+        consumer = sys.argv[0][:-3]
+        print("%6s %14s %14s %8s" % ("Lines", "Per line ups", "Bulk ups", "Speedup"))
+        for num in (8, 32, 64):
+            if first + num > gpiod_chip.num_lines:
+                print("%6d chip only has %d lines" % (num, gpiod_chip.num_lines))
+                continue
+            lines = [self.lib.gpiod_chip_get_line(gpiod_chip, offset) for offset in range(first, first + num)]
+            bulk = linebulk.linebulk(lines)
+            try:
+                bulk.requestOutput(consumer)
+            except RuntimeError as e:
+                print("%6d %s" % (num, e))
+                continue
+            perLine = self.perLine(lines, count)
+            bulkSecs = self.bulk(bulk, count)
+            bulk.release()
+            print("%6d %14.0f %14.0f %7.2fx" % (num, count / perLine, count / bulkSecs, perLine / bulkSecs))
+        self.lib.gpiod_chip_close(gpiod_chip)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--chip", help="GPIO chip number (default 0 '/dev/gpiochip0')", type=int, default=0)
+    parser.add_argument("--first", help="First line number (default 0)", type=int, default=0)
+    parser.add_argument("--count", help="Updates of all lines per measurement (default 10000)", type=int, default=10000)
+    args = parser.parse_args()
+    obj = bulkbench()
+    obj.main(args.chip, args.first, args.count)
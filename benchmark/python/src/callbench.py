@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+ABI vs API mode call overhead benchmark
+-------------
+Time the same C call through the ABI mode (dlopen) and the compiled API mode
+binding. Calls that only read a handle field are used so the result is the
+binding overhead and not the device. Pass --chip and --line to also time
+gpiod_line_set_value on a real output line.
+
+libpwmio is not included since every call is a sysfs write.
+"""
+
+import sys, time
+from argparse import *
+
+
+class callbench:
+
+    def timeCalls(self, func, args, count):
+        """Return ns per call.
+        """
+        start = time.perf_counter()
+        for i in range(count):
+            func(*args)
+        return (time.perf_counter() - start) * 1000000000 / count
+
+    def gpiodVersion(self, ffi, lib):
+        return lib.gpiod_version_string, ()
+
+    def i2cFd(self, ffi, lib):
+        return lib.i2c_fd, (ffi.new("i2c_t*"),)
+
+    def spiFd(self, ffi, lib):
+        return lib.spi_fd, (ffi.new("spi_t*"),)
+
+    def serialFd(self, ffi, lib):
+        return lib.serial_fd, (ffi.new("serial_t*"),)
+
+    def compare(self, name, load, setup, count):
+        """Print ABI and API mode ns per call for one function.
+        """
+        try:
+            abi = load(api=False)
+            api = load(api=True)
+        except (ImportError, OSError) as e:
+            print("%-32s %s" % (name, e))
+            return
+        abiNs = self.timeCalls(*setup(*abi), count)
+        if api[0] is abi[0]:
+            print("%-32s %10.1f %10s" % (name, abiNs, "not built"))
+        else:
+            apiNs = self.timeCalls(*setup(*api), count)
+            print("%-32s %10.1f %10.1f %9.2fx" % (name, abiNs, apiNs, abiNs / apiNs))
+
+    def setValue(self, load, chip, line, count):
+        """Return ns per gpiod_line_set_value call or None if the line can't be
+        used.
+        """
+        ffi, lib = load
+        gpiod_chip = lib.gpiod_chip_open_by_number(chip)
+        if gpiod_chip == ffi.NULL:
+            return None
+        ns = None
+        gpiod_line = lib.gpiod_chip_get_line(gpiod_chip, line)
+        if gpiod_line != ffi.NULL:
+            consumer = sys.argv[0][:-3]
+            if lib.gpiod_line_request_output(gpiod_line, consumer.encode('utf-8'), 0) == 0:
+                ns = self.timeCalls(lib.gpiod_line_set_value, (gpiod_line, 0), count)
+            lib.gpiod_line_release(gpiod_line)
+        lib.gpiod_chip_close(gpiod_chip)
+        return ns
+
+    def main(self, count, chip, line):
+        print("%-32s %10s %10s %10s" % ("Call", "ABI ns", "API ns", "Speedup"))
+        try:
+            from libgpiod import libgpiod
+            self.compare("gpiod_version_string", libgpiod.load, self.gpiodVersion, count)
+            if chip is not None:
+                abiNs = self.setValue(libgpiod.load(api=False), chip, line, count)
+                apiNs = self.setValue(libgpiod.load(api=True), chip, line, count)
+                if abiNs is None or apiNs is None:
+                    print("%-32s unable to use chip %d line %d" % ("gpiod_line_set_value", chip, line))
+                else:
+                    print("%-32s %10.1f %10.1f %9.2fx" % ("gpiod_line_set_value", abiNs, apiNs, abiNs / apiNs))
+        except (ImportError, OSError) as e:
+            print("%-32s %s" % ("libgpiod", e))
+        try:
+            from libperiphery import libperipheryi2c, libperipheryspi, libperipheryserial
+            self.compare("i2c_fd", libperipheryi2c.load, self.i2cFd, count)
+            self.compare("spi_fd", libperipheryspi.load, self.spiFd, count)
+            self.compare("serial_fd", libperipheryserial.load, self.serialFd, count)
+        except ImportError as e:
+            print("%-32s %s" % ("libperiphery", e))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--count", help="Calls per measurement (default 1000000)", type=int, default=1000000)
+    parser.add_argument("--chip", help="GPIO chip number to time gpiod_line_set_value (default none)", type=int, default=None)
+    parser.add_argument("--line", help="GPIO output line number (default 203 IOG11 on NanoPi Duo)", type=int, default=203)
+    args = parser.parse_args()
+    obj = callbench()
+    obj.main(args.count, args.chip, args.line)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Binding startup benchmark
+-------------
+Report cold import time, first construction time (cdef parse and dlopen) and
+cached construction time for each binding package. Every package is measured
+in a fresh interpreter so nothing is shared between runs.
+"""
+
+import sys, subprocess
+from argparse import *
+
+
+class startupbench:
+
+    # Module and class for each binding
+    bindings = [
+        ("libgpiod.libgpiod", "libgpiod"),
+        ("libperiphery.libperipheryi2c", "libperipheryi2c"),
+        ("libperiphery.libperipheryspi", "libperipheryspi"),
+        ("libperiphery.libperipheryserial", "libperipheryserial"),
+        ("libpwmio.libpwmio", "libpwmio")
+    ]
+
+    # Run in child interpreter, prints import, first and cached times in ms
+    script = """
+import importlib, time
+start = time.perf_counter()
+module = importlib.import_module("%s")
+imported = time.perf_counter()
+getattr(module, "%s")()
+first = time.perf_counter()
+for i in range(%d):
+    getattr(module, "%s")()
+cached = (time.perf_counter() - first) / %d
+print("%%f %%f %%f" %% ((imported - start) * 1000, (first - imported) * 1000, cached * 1000))
+"""
+
+    def measure(self, module, cls, count):
+        """Run one binding in a child interpreter and return (import, first,
+        cached) times in ms or None with the error text.
+        """
+        proc = subprocess.run([sys.executable, "-c", self.script % (module, cls, count, cls, count)],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            return None, proc.stderr.decode('utf-8').strip().splitlines()[-1]
+        return tuple(float(v) for v in proc.stdout.split()), None
+
+    def main(self, runs, count):
+        """Print average times for each binding.
+        """
+        print("%-32s %10s %10s %10s" % ("Binding", "Import ms", "First ms", "Cached ms"))
+        for module, cls in self.bindings:
+            totals = [0.0, 0.0, 0.0]
+            error = None
+            for i in range(runs):
+                times, error = self.measure(module, cls, count)
+                if times is None:
+                    break
+                totals = [t + v for t, v in zip(totals, times)]
+            if error is None:
+                print("%-32s %10.3f %10.3f %10.4f" % (module, totals[0] / runs, totals[1] / runs, totals[2] / runs))
+            else:
+                print("%-32s %s" % (module, error))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--runs", help="Fresh interpreter runs per binding (default 5)", type=int, default=5)
+    parser.add_argument("--count", help="Cached constructions per run (default 1000)", type=int, default=1000)
+    args = parser.parse_args()
+    obj = startupbench()
+    obj.main(args.runs, args.count)
@@ -12,43 +12,62 @@ well.
 import sys, time
 from argparse import *
 from cffi import FFI
-from libperiphery import libperipheryi2c
+from libperiphery import libperipheryi2c, registermap
 
 
 class adxl345:
+
+    # FIFO entries, 32 in the FIFO plus one in the data registers. A full
+    # stream mode FIFO reports 33 in FIFO_STATUS.
+    fifoSize = 33
+    # I2C_RDWR accepts 42 messages, a register write and a read per entry
+    maxEntries = 21
     
     def __init__(self):
         """Create library interface.
         """    
         self.i2c = libperipheryi2c.libperipheryi2c()
+        self.ffi = self.i2c.ffi
+        self.lib = self.i2c.lib
+        self.fifoMsgs = None
+        # Shadow registers by address
+        self.registerMaps = {}
+        self.fifoOverruns = 0
+        self.fifoSamples = 0
             
+    def registers(self, handle, addr):
+        """Return shadow registermap of the device at addr.
+        """
+        regs = self.registerMaps.get(addr)
+        if regs is None or regs.handle is not handle:
+            regs = registermap.registermap(self.i2c, handle, addr)
+            self.registerMaps[addr] = regs
+        return regs
+
     def getRange(self, handle, addr):
         """Retrieve the current range of the accelerometer. See setRange for
         the possible range constant values that will be returned.
         """
-        return self.i2c.readReg(handle, addr, 0x31) & 0x03
+        return self.registers(handle, addr).read(0x31) & 0x03
 
     def setRange(self, handle, addr, value):
-        """Set the range of the accelerometer to the provided value. Read the data
-        format register to preserve bits. Update the data rate, make sure that the
+        """Set the range of the accelerometer to the provided value. The data format
+        register's other bits are preserved. Update the data rate, make sure that the
         FULL-RES bit is enabled for range scaling.
         """
-        regVal = self.i2c.readReg(handle, addr, 0x31) & ~0x0f
-        regVal |= value
-        regVal |= 0x08  # FULL-RES bit enabled
-        # Write the updated format register
-        self.i2c.writeReg(handle, addr, 0x31, regVal)
+        # FULL-RES bit enabled, the shadow register saves the read
+        self.registers(handle, addr).update(0x31, 0x0f, value | 0x08)
     
     def getDataRate(self, handle, addr):
         """Retrieve the current data rate.
         """
-        return self.i2c.readReg(handle, addr, 0x2c) & 0x0f
+        return self.registers(handle, addr).read(0x2c) & 0x0f
     
     def setDataRate(self, handle, addr, rate):
         """Set the data rate of the accelerometer. Note: The LOW_POWER bits are
         currently ignored, we always keep the device in 'normal' mode.
         """
-        self.i2c.writeReg(handle, addr, 0x2c, rate & 0x0f)
+        self.registers(handle, addr).write(0x2c, rate & 0x0f)
     
     def read(self, handle, addr):
         """Retrieve x, y, z 16 bit data in 6 bytes.
@@ -66,23 +85,138 @@ class adxl345:
             z = z - (1 << 16)    
         return (x, y, z)
 
-    def main(self, device, address):
+    def buildFifoMsgs(self, addr):
+        """Preallocate a DATAX0 register write and 6 byte read for every FIFO
+        entry. Each read pops one entry, so entries are read into consecutive
+        rows of fifoData.
+        """
+        self.fifoReg = self.ffi.new("uint8_t[1]", [0x32])
+        self.fifoData = self.ffi.new("uint8_t[]", self.fifoSize * 6)
+        self.fifoBuffer = self.ffi.buffer(self.fifoData)
+        self.fifoMsgs = self.ffi.new("struct i2c_msg[]", self.fifoSize * 2)
+        for i in range(self.fifoSize):
+            self.fifoMsgs[i * 2].addr = addr
+            self.fifoMsgs[i * 2].flags = 0x00
+            self.fifoMsgs[i * 2].len = 1
+            self.fifoMsgs[i * 2].buf = self.fifoReg
+            self.fifoMsgs[i * 2 + 1].addr = addr
+            self.fifoMsgs[i * 2 + 1].flags = self.lib.I2C_M_RD
+            self.fifoMsgs[i * 2 + 1].len = 6
+            self.fifoMsgs[i * 2 + 1].buf = self.fifoData + i * 6
+        self.fifoAddr = addr
+
+    def startFifo(self, handle, addr, watermark=16, rate=0x0f):
+        """Start measuring at rate (0x0f is 3200 Hz) in FIFO stream mode with
+        the watermark interrupt on INT1 (active high).
+        """
+        self.buildFifoMsgs(addr)
+        self.setDataRate(handle, addr, rate)
+        regs = self.registers(handle, addr)
+        # Stream mode, samples bits set watermark
+        regs.write(0x38, 0x80 | (watermark & 0x1f))
+        # Watermark to INT1, then enable it
+        regs.write(0x2f, 0x00)
+        regs.write(0x2e, 0x02)
+        # Measure
+        regs.write(0x2d, 0x08)
+
+    def stopFifo(self, handle, addr):
+        """Disable interrupts and bypass FIFO.
+        """
+        regs = self.registers(handle, addr)
+        regs.write(0x2e, 0x00)
+        regs.write(0x38, 0x00)
+
+    def drainFifo(self, handle, addr):
+        """Read every FIFO entry into fifoData. INT_SOURCE and FIFO_STATUS are
+        read in one transaction and the entries in as few i2c_transfer calls as
+        I2C_RDWR allows (two for a full FIFO). Returns number of entries read,
+        rows of 3 little endian 16 bit values.
+        """
+        if self.fifoMsgs is None or self.fifoAddr != addr:
+            self.buildFifoMsgs(addr)
+        source, status = self.i2c.transaction(handle, addr, [[0x30], 1, [0x39], 1])
+        if source[0] & 0x01:
+            self.fifoOverruns += 1
+        # Never more than fifoSize, clamped so a bad status byte can't overrun fifoMsgs
+        entries = min(status[0] & 0x3f, self.fifoSize)
+        start = 0
+        while start < entries:
+            count = min(entries - start, self.maxEntries)
+            if self.lib.i2c_transfer(handle, self.fifoMsgs + start * 2, count * 2) < 0:
+                raise RuntimeError(self.ffi.string(self.lib.i2c_errmsg(handle)).decode('utf-8'))
+            start += count
+        self.fifoSamples += entries
+        return entries
+
+    def streamFifo(self, handle, addr, chip, line, watermark=16, rate=0x0f, timeoutSecs=1.0):
+        """Generator yielding NumPy int16 arrays of shape (samples, 3) each time
+        the watermark interrupt on libgpiod chip and line fires. There's no bus
+        traffic between interrupts. If no interrupt comes within timeoutSecs the
+        FIFO is drained anyway. Requires NumPy and libgpiod.
+        """
+        import numpy as np
+        from libgpiod import libgpiod
+        gpiod = libgpiod.libgpiod()
+        gpiodChip = gpiod.lib.gpiod_chip_open_by_number(chip)
+        if gpiodChip == gpiod.ffi.NULL:
+            raise RuntimeError("Unable to open chip %d" % chip)
+        try:
+            gpiodLine = gpiod.lib.gpiod_chip_get_line(gpiodChip, line)
+            if gpiodLine == gpiod.ffi.NULL or gpiod.lib.gpiod_line_request_rising_edge_events(gpiodLine, sys.argv[0][:-3].encode('utf-8')) < 0:
+                raise RuntimeError("Unable to request rising edge events for line %d" % line)
+            timespec = gpiod.ffi.new("struct timespec*")
+            timespec.tv_sec = int(timeoutSecs)
+            timespec.tv_nsec = int((timeoutSecs - int(timeoutSecs)) * 1000000000)
+            event = gpiod.ffi.new("struct gpiod_line_event*")
+            self.startFifo(handle, addr, watermark, rate)
+            samples = np.frombuffer(self.fifoBuffer, dtype="<i2").reshape(self.fifoSize, 3)
+            try:
+                while True:
+                    rc = gpiod.lib.gpiod_line_event_wait(gpiodLine, timespec)
+                    if rc < 0:
+                        raise RuntimeError("gpiod_line_event_wait error")
+                    if rc == 1:
+                        gpiod.lib.gpiod_line_event_read(gpiodLine, event)
+                    # Keep draining while at or over watermark, INT1 only rises
+                    # again after it has dropped
+                    while True:
+                        entries = self.drainFifo(handle, addr)
+                        if entries:
+                            yield samples[:entries].copy()
+                        if entries < watermark:
+                            break
+            finally:
+                self.stopFifo(handle, addr)
+                gpiod.lib.gpiod_line_release(gpiodLine)
+        finally:
+            gpiod.lib.gpiod_chip_close(gpiodChip)
+
+    def main(self, device, address, chip=None, line=None):
         handle = self.i2c.open(device)
         # ADXL345 wired up on port 0x53?
         if self.i2c.readReg(handle, address, 0x00) == 0xE5:
-            # Enable the accelerometer
-            self.i2c.writeReg(handle, address, 0x2d, 0x08)
             # +/- 2g
             self.setRange(handle, address, 0x00)
-            # 100 Hz
-            self.setDataRate(handle, address, 0x0a)
-            print("Range = %d, data rate = %d" % (self.getRange(handle, address), self.getDataRate(handle, address)))
-            count = 0
-            while count < 100:
-                data = self.read(handle, address)
-                print("x: %04d, y: %04d, z: %04d" % (data[0], data[1], data[2]))
-                time.sleep(0.5)
-                count += 1
+            if line is not None:
+                start = time.monotonic()
+                for samples in self.streamFifo(handle, address, chip, line):
+                    print("%2d samples | x: %04d, y: %04d, z: %04d | overruns %d" % (len(samples), samples[-1][0], samples[-1][1], samples[-1][2], self.fifoOverruns))
+                    if time.monotonic() - start > 5:
+                        break
+                print("%d samples in %.1f seconds" % (self.fifoSamples, time.monotonic() - start))
+            else:
+                # Enable the accelerometer
+                self.registers(handle, address).write(0x2d, 0x08)
+                # 100 Hz
+                self.setDataRate(handle, address, 0x0a)
+                print("Range = %d, data rate = %d" % (self.getRange(handle, address), self.getDataRate(handle, address)))
+                count = 0
+                while count < 100:
+                    data = self.read(handle, address)
+                    print("x: %04d, y: %04d, z: %04d" % (data[0], data[1], data[2]))
+                    time.sleep(0.5)
+                    count += 1
         else:
             print("Not ADXL345?")
         self.i2c.close(handle)
@@ -91,8 +225,10 @@ if __name__ == "__main__":
     parser = ArgumentParser()
     parser.add_argument("--device", help="I2C device name (default '/dev/i2c-0')", type=str, default="/dev/i2c-0")
     parser.add_argument("--address", help="ADXL345 address (default 0x53)", type=str, default="0x53")
+    parser.add_argument("--chip", help="GPIO chip number of INT1 line (default 0 '/dev/gpiochip0')", type=int, default=0)
+    parser.add_argument("--line", help="GPIO line number wired to INT1, streams 3200 Hz FIFO samples for 5 seconds (requires NumPy and libgpiod)", type=int, default=None)
     args = parser.parse_args()
     obj = adxl345()
     # Convert from hex string to int
     address = int(args.address, 16)
-    obj.main(args.device, address)
+    obj.main(args.device, address, args.chip, args.line)
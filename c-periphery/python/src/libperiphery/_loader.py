@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Shared FFI loader for libperiphery
+-------------
+libperipheryi2c, libperipheryspi and libperipheryserial load their library
+through here so each is set up once per process no matter how many instances
+are created.
+"""
+
+import importlib, threading
+from cffi import FFI
+
+# FFI and library by library name and mode
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load(name, cdef, api=True):
+    """Return the shared FFI and library for c-periphery library name (i.e.
+    peripheryi2c). The compiled API mode module libperiphery._lib<name> built
+    by setup.py is used if present, otherwise cdef is parsed and
+    /usr/local/lib/lib<name>.so is opened in ABI mode. Pass api=False to force
+    ABI mode. Either way this only happens on the first call.
+    """
+    key = (name, api)
+    if key not in _loaded:
+        with _lock:
+            # Another thread may have loaded it while we waited
+            if key not in _loaded:
+                loaded = None
+                if api:
+                    try:
+                        module = importlib.import_module("libperiphery._lib%s" % name)
+                        loaded = (module.ffi, module.lib)
+                    except ImportError:
+                        # No compiler when installed, so share ABI mode
+                        loaded = _loaded.get((name, False))
+                if loaded is None:
+                    ffi = FFI()
+                    ffi.cdef(cdef)
+                    loaded = (ffi, ffi.dlopen("/usr/local/lib/lib%s.so" % name))
+                    _loaded[(name, False)] = loaded
+                _loaded[key] = loaded
+    return _loaded[key]
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Interrupt driven sensor acquisition
+-------------
+Polling a sensor on a timer wastes bus time and adds up to a full period of
+latency. acquisition requests rising edge events on the sensor's data ready
+(INT) line with libgpiod and, on each edge, runs a preplanned i2cdevice read
+from a dedicated thread. Samples are put in a bounded queue with the kernel
+edge timestamp (ns). Requires the libgpiod bindings.
+
+dev = i2cdevice.i2cdevice("/dev/i2c-0", 0x68)
+acq = acquisition.acquisition(0, 6, dev.readPlan(0x3b, 14), decode=struct.Struct(">7h").unpack)
+acq.start()
+while True:
+    timestamp, data = acq.queue.get()
+"""
+
+import collections, queue, sys, threading
+
+# Sample with kernel edge timestamp in nanoseconds
+sample = collections.namedtuple("sample", ["timestamp", "data"])
+
+
+class acquisition:
+
+    def __init__(self, chip, line, plan, decode=bytes, maxsize=1024, consumer=None, timeoutSecs=0.1):
+        """Request rising edge events on chip number and line. plan is an
+        i2cdevice.readplan, decode turns its buffer into the sample data.
+        Samples that don't fit in a queue of maxsize are counted in dropped.
+        The thread checks for stop at least every timeoutSecs.
+        """
+        from libgpiod import libgpiod
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        self.plan = plan
+        self.decode = decode
+        self.queue = queue.Queue(maxsize)
+        if consumer is None:
+            consumer = sys.argv[0][:-3]
+        self.chip = self.lib.gpiod_chip_open_by_number(chip)
+        if self.chip == self.ffi.NULL:
+            raise RuntimeError("Unable to open chip %d" % chip)
+        self.line = self.lib.gpiod_chip_get_line(self.chip, line)
+        if self.line == self.ffi.NULL or self.lib.gpiod_line_request_rising_edge_events(self.line, consumer.encode('utf-8')) < 0:
+            self.lib.gpiod_chip_close(self.chip)
+            raise RuntimeError("Unable to request rising edge events for line %d" % line)
+        self.event = self.ffi.new("struct gpiod_line_event*")
+        self.timespec = self.ffi.new("struct timespec*")
+        self.timespec.tv_sec = int(timeoutSecs)
+        self.timespec.tv_nsec = int((timeoutSecs - int(timeoutSecs)) * 1000000000)
+        self.thread = None
+        self.running = False
+        self.error = None
+        self.samples = 0
+        self.dropped = 0
+
+    def run(self):
+        """Runs in acquisition thread, the GIL is released while waiting.
+        """
+        wait = self.lib.gpiod_line_event_wait
+        read = self.lib.gpiod_line_event_read
+        event = self.event
+        try:
+            while self.running:
+                rc = wait(self.line, self.timespec)
+                if rc < 0:
+                    raise RuntimeError("gpiod_line_event_wait error")
+                if rc == 0:
+                    continue
+                if read(self.line, event) < 0:
+                    raise RuntimeError("gpiod_line_event_read error")
+                data = self.decode(self.plan.read())
+                try:
+                    self.queue.put_nowait(sample(event.ts.tv_sec * 1000000000 + event.ts.tv_nsec, data))
+                    self.samples += 1
+                except queue.Full:
+                    self.dropped += 1
+        except Exception as e:
+            self.error = e
+        self.running = False
+
+    def start(self):
+        """Start acquisition thread.
+        """
+        self.error = None
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop acquisition thread. Queued samples can still be read. Raises
+        any error that stopped the thread.
+        """
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            raise RuntimeError("Acquisition stopped: %s" % self.error)
+
+    def close(self):
+        """Stop and release line.
+        """
+        try:
+            self.stop()
+        finally:
+            if self.chip is not None:
+                self.lib.gpiod_line_release(self.line)
+                self.lib.gpiod_chip_close(self.chip)
+                self.chip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Out-of-line API mode build for libperiphery
+-------------
+setup.py uses this to compile libperiphery._libperipheryi2c,
+libperiphery._libperipheryspi and libperiphery._libperipheryserial from the
+same cdefs used in ABI mode. Calls go straight to c-periphery instead of
+through libffi. c-periphery headers are expected where install.sh cloned the
+project, set PERIPHERY_SRC to use another location. You can also run
+python libperiphery/build.py in the src dir to build in place.
+"""
+
+import os, sys
+from cffi import FFI
+
+# Make libperiphery package importable when run by setup.py or directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from libperiphery import libperipheryi2c, libperipheryspi, libperipheryserial
+
+# install.sh clones c-periphery next to the userspaceio project
+src = os.environ.get("PERIPHERY_SRC", os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../../../c-periphery/src")))
+
+
+def builder(name, header, cdef):
+    """Create FFI builder for one c-periphery shared library.
+    """
+    ffibuilder = FFI()
+    ffibuilder.set_source("libperiphery._lib%s" % name, "#include \"%s\"" % header,
+                          include_dirs=[src], libraries=[name], library_dirs=["/usr/local/lib"],
+                          runtime_library_dirs=["/usr/local/lib"])
+    ffibuilder.cdef(cdef)
+    return ffibuilder
+
+
+i2cbuilder = builder("peripheryi2c", "i2c.h", libperipheryi2c.cdef)
+spibuilder = builder("peripheryspi", "spi.h", libperipheryspi.cdef)
+serialbuilder = builder("peripheryserial", "serial.h", libperipheryserial.cdef)
+
+if __name__ == "__main__":
+    for ffibuilder in (i2cbuilder, spibuilder, serialbuilder):
+        ffibuilder.compile(verbose=True)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Allocation free I2C device
+-------------
+libperipheryi2c builds new data buffers and a struct i2c_msg array on every
+call. i2cdevice owns one handle for one address with message and scratch
+buffers allocated once, so writeReg, readReg, readWord and readArray only set
+a few fields before i2c_transfer. readPlan precompiles a register read with
+its own messages and buffer to run cycle after cycle without allocating.
+
+dev = i2cdevice.i2cdevice("/dev/i2c-0", 0x68)
+accel = dev.readPlan(0x3b, 6)
+while True:
+    x, y, z = struct.unpack_from(">3h", accel.read())
+"""
+
+from libperiphery import libperipheryi2c
+
+
+class readplan:
+
+    def __init__(self, device, reg, length):
+        """Preallocate messages and buffer for reading length bytes starting
+        at reg.
+        """
+        self.device = device
+        self.ffi = device.ffi
+        self.reg = self.ffi.new("uint8_t[1]", [reg])
+        self.data = self.ffi.new("uint8_t[]", length)
+        # Reusable Python view of data
+        self.buffer = self.ffi.buffer(self.data)
+        self.msgs = self.ffi.new("struct i2c_msg[2]")
+        device.buildRead(self.msgs, self.reg, self.data, length)
+
+    def read(self):
+        """Run the read and return buffer. Contents are overwritten by the
+        next read.
+        """
+        self.device.transfer(self.msgs, 2)
+        return self.buffer
+
+
+class i2cdevice:
+
+    def __init__(self, device, addr, scratchSize=32, handle=None):
+        """Open device, or use an open libperipheryi2c handle, for addr.
+        readArray can read up to scratchSize bytes.
+        """
+        self.i2c = libperipheryi2c.libperipheryi2c()
+        self.ffi = self.i2c.ffi
+        self.lib = self.i2c.lib
+        self.owner = handle is None
+        self.handle = self.i2c.open(device) if handle is None else handle
+        self.addr = addr
+        self.regBuf = self.ffi.new("uint8_t[2]")
+        self.scratch = self.ffi.new("uint8_t[]", scratchSize)
+        self.scratchSize = scratchSize
+        self.scratchBuffer = self.ffi.buffer(self.scratch)
+        # uint8_t[length] views of scratch by length for readArray
+        self.scratchViews = {}
+        # Write message and register write/read message pair
+        self.writeMsgs = self.ffi.new("struct i2c_msg[1]")
+        self.writeMsgs[0].addr = addr
+        self.writeMsgs[0].flags = 0x00
+        self.writeMsgs[0].len = 2
+        self.writeMsgs[0].buf = self.regBuf
+        self.readMsgs = self.ffi.new("struct i2c_msg[2]")
+        self.buildRead(self.readMsgs, self.regBuf, self.scratch, 1)
+        self.i2cTransfer = self.lib.i2c_transfer
+
+    def buildRead(self, msgs, reg, data, length):
+        """Fill msgs with register write and read of length bytes into data.
+        """
+        msgs[0].addr = self.addr
+        msgs[0].flags = 0x00
+        msgs[0].len = 1
+        msgs[0].buf = reg
+        msgs[1].addr = self.addr
+        msgs[1].flags = self.lib.I2C_M_RD
+        msgs[1].len = length
+        msgs[1].buf = data
+
+    def transfer(self, msgs, count):
+        if self.i2cTransfer(self.handle, msgs, count) < 0:
+            raise RuntimeError(self.ffi.string(self.lib.i2c_errmsg(self.handle)).decode('utf-8'))
+
+    def close(self):
+        """Close handle if it was opened by i2cdevice.
+        """
+        if self.owner:
+            self.i2c.close(self.handle)
+
+    def writeReg(self, reg, value):
+        """Write value to register.
+        """
+        self.regBuf[0] = reg
+        self.regBuf[1] = value
+        self.transfer(self.writeMsgs, 1)
+
+    def readReg(self, reg):
+        """Read register.
+        """
+        self.regBuf[0] = reg
+        self.readMsgs[1].len = 1
+        self.transfer(self.readMsgs, 2)
+        return self.scratch[0]
+
+    def readWord(self, reg):
+        """Read signed big endian register pair in one transaction.
+        """
+        self.regBuf[0] = reg
+        self.readMsgs[1].len = 2
+        self.transfer(self.readMsgs, 2)
+        value = (self.scratch[0] << 8) + self.scratch[1]
+        return value - 0x10000 if value >= 0x8000 else value
+
+    def readArray(self, reg, length):
+        """Read length bytes starting at reg into the scratch buffer and return
+        a uint8_t[length] view of it, so len() is length like
+        libperipheryi2c.readArray. Contents are overwritten by the next read.
+        """
+        if length > self.scratchSize:
+            raise RuntimeError("Read of %d bytes larger than scratch buffer of %d" % (length, self.scratchSize))
+        view = self.scratchViews.get(length)
+        if view is None:
+            view = self.ffi.cast("uint8_t(*)[%d]" % length, self.scratch)[0]
+            self.scratchViews[length] = view
+        self.regBuf[0] = reg
+        self.readMsgs[1].len = length
+        self.transfer(self.readMsgs, 2)
+        return view
+
+    def readInto(self, reg, buf):
+        """Read len(buf) bytes starting at reg directly into a writable buffer.
+        Returns number of bytes read.
+        """
+        data = self.ffi.from_buffer("uint8_t[]", buf, require_writable=True)
+        self.regBuf[0] = reg
+        self.readMsgs[1].len = len(data)
+        self.readMsgs[1].buf = data
+        try:
+            self.transfer(self.readMsgs, 2)
+        finally:
+            self.readMsgs[1].buf = self.scratch
+        return len(data)
+
+    def readPlan(self, reg, length):
+        """Return readplan for length bytes starting at reg.
+        """
+        return readplan(self, reg, length)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
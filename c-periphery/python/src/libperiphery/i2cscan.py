@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Parallel I2C bus scan
+-------------
+Probe every address on every /dev/i2c-* bus at the same time, one worker
+thread per bus (the GIL is released during i2c_transfer). Each address gets
+one transaction, a single byte read. Devices that answer are matched against
+knownDevices by reading their ID register.
+
+for device in i2cscan.i2cscan().scan():
+    print(device)
+"""
+
+import glob, re
+from concurrent.futures import ThreadPoolExecutor
+from libperiphery import libperipheryi2c
+
+# Name, addresses, ID register and ID value
+knownDevices = [
+    ("MPU-6050", (0x68, 0x69), 0x75, 0x68),
+    ("ADXL345", (0x53, 0x1d), 0x00, 0xe5),
+    ("BMP280", (0x76, 0x77), 0xd0, 0x58),
+    ("BME280", (0x76, 0x77), 0xd0, 0x60),
+]
+
+
+class i2cscan:
+
+    def __init__(self, first=0x03, last=0x77, known=None):
+        """Probe addresses first to last (the i2cdetect default range).
+        """
+        self.i2c = libperipheryi2c.libperipheryi2c()
+        self.ffi = self.i2c.ffi
+        self.lib = self.i2c.lib
+        self.first = first
+        self.last = last
+        self.known = knownDevices if known is None else known
+
+    def buses(self):
+        """Return /dev/i2c-* devices in bus number order.
+        """
+        return sorted(glob.glob("/dev/i2c-*"), key=lambda name: int(re.sub(r"\D", "", name) or 0))
+
+    def probe(self, handle, msgs, addr):
+        """Return True if addr acknowledges a one byte read.
+        """
+        msgs[0].addr = addr
+        return self.lib.i2c_transfer(handle, msgs, 1) == 0
+
+    def identify(self, handle, addr):
+        """Return name of known device at addr or None.
+        """
+        for name, addresses, reg, value in self.known:
+            if addr in addresses:
+                try:
+                    if self.i2c.readReg(handle, addr, reg) == value:
+                        return name
+                except RuntimeError:
+                    pass
+        return None
+
+    def scanBus(self, device):
+        """Return list of dicts with bus, address and device name (None if not
+        known) for each address on one bus that answers.
+        """
+        found = []
+        try:
+            handle = self.i2c.open(device)
+        except RuntimeError:
+            return found
+        try:
+            # Reused for every probe
+            data = self.ffi.new("uint8_t[1]")
+            msgs = self.ffi.new("struct i2c_msg[1]")
+            msgs[0].flags = self.lib.I2C_M_RD
+            msgs[0].len = 1
+            msgs[0].buf = data
+            for addr in range(self.first, self.last + 1):
+                if self.probe(handle, msgs, addr):
+                    found.append({'bus': device, 'address': addr, 'device': self.identify(handle, addr)})
+        finally:
+            self.i2c.close(handle)
+        return found
+
+    def scan(self, buses=None):
+        """Scan buses (default all) in parallel and return inventory in bus
+        and address order.
+        """
+        if buses is None:
+            buses = self.buses()
+        if not buses:
+            return []
+        with ThreadPoolExecutor(max_workers=len(buses)) as executor:
+            results = list(executor.map(self.scanBus, buses))
+        return [device for found in results for device in found]
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Shared I2C bus scheduler
+-------------
+Drivers that open their own handle on the same /dev/i2c-N don't coordinate
+and have no notion of sampling rate. i2cscheduler owns one handle per bus,
+serializes every transaction with a lock and polls registered devices at
+their rates from one thread. When several devices are due the highest
+priority goes first. A device that can't be read before its next deadline
+counts missed deadlines and skips ahead instead of bursting to catch up.
+Other code can use the bus between polls with bus().
+
+sched = i2cscheduler.i2cscheduler("/dev/i2c-0")
+sched.add("mpu6050", 200, lambda handle: mpu.getRawData(handle, 0x68), callback, priority=1)
+sched.add("adxl345", 100, lambda handle: adxl.read(handle, 0x53), callback)
+sched.start()
+"""
+
+import threading, time
+from contextlib import contextmanager
+from libperiphery import libperipheryi2c
+
+
+class i2cscheduler:
+
+    def __init__(self, device):
+        """Open the bus.
+        """
+        self.i2c = libperipheryi2c.libperipheryi2c()
+        self.handle = self.i2c.open(device)
+        self.lock = threading.Lock()
+        # Entries by name
+        self.devices = {}
+        self.thread = None
+        self.stopped = threading.Event()
+        self.busy = 0.0
+        self.started = None
+        self.ended = None
+
+    @contextmanager
+    def bus(self):
+        """Hold the bus lock for the with block and return the handle. Time
+        held counts as bus time.
+        """
+        with self.lock:
+            start = time.perf_counter()
+            try:
+                yield self.handle
+            finally:
+                self.busy += time.perf_counter() - start
+
+    def add(self, name, rate, read, callback=None, priority=0):
+        """Poll read(handle) rate times a second. callback(name, timestamp,
+        data) is called with the result and monotonic read time outside the
+        bus lock. Higher priority runs first when devices are due together.
+        Adding an existing name replaces it.
+        """
+        with self.lock:
+            self.devices[name] = {"name": name, "period": 1.0 / rate, "read": read, "callback": callback,
+                                  "priority": priority, "next": time.monotonic(), "samples": 0, "missed": 0,
+                                  "errors": 0, "late": 0.0, "busy": 0.0}
+
+    def remove(self, name):
+        with self.lock:
+            self.devices.pop(name, None)
+
+    def due(self, now):
+        """Return highest priority device due at now or None.
+        """
+        best = None
+        for entry in list(self.devices.values()):
+            if entry["next"] <= now and (best is None or (entry["priority"], -entry["next"]) > (best["priority"], -best["next"])):
+                best = entry
+        return best
+
+    def poll(self, entry):
+        """Read device under the bus lock, call callback and schedule next
+        read.
+        """
+        now = time.monotonic()
+        late = now - entry["next"]
+        if late > entry["late"]:
+            entry["late"] = late
+        data = None
+        with self.lock:
+            start = time.perf_counter()
+            try:
+                data = entry["read"](self.handle)
+                entry["samples"] += 1
+            except Exception:
+                entry["errors"] += 1
+            busy = time.perf_counter() - start
+            self.busy += busy
+            entry["busy"] += busy
+        if data is not None and entry["callback"] is not None:
+            try:
+                entry["callback"](entry["name"], now, data)
+            except Exception:
+                entry["errors"] += 1
+        # Skip deadlines that have already passed
+        entry["next"] += entry["period"]
+        now = time.monotonic()
+        if entry["next"] <= now:
+            skipped = int((now - entry["next"]) / entry["period"]) + 1
+            entry["missed"] += skipped
+            entry["next"] += skipped * entry["period"]
+
+    def run(self):
+        """Runs in scheduler thread until stopped.
+        """
+        while not self.stopped.is_set():
+            now = time.monotonic()
+            entry = self.due(now)
+            if entry is not None:
+                self.poll(entry)
+                continue
+            deadlines = [entry["next"] for entry in list(self.devices.values())]
+            self.stopped.wait(min(deadlines) - now if deadlines else 0.1)
+
+    def start(self):
+        """Start scheduler thread.
+        """
+        now = time.monotonic()
+        with self.lock:
+            for entry in self.devices.values():
+                entry["next"] = now
+        self.busy = 0.0
+        self.started = time.perf_counter()
+        self.ended = None
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop scheduler thread.
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+            self.ended = time.perf_counter()
+
+    def close(self):
+        """Stop and close the bus.
+        """
+        self.stop()
+        self.i2c.close(self.handle)
+
+    def stats(self):
+        """Return dict with bus utilization (0-1) and, by device name, target
+        and achieved rate, samples, missed deadlines, errors, max lateness in
+        microseconds and bus share (0-1).
+        """
+        if self.started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.ended if self.ended is not None else time.perf_counter()) - self.started
+        stats = {'utilization': self.busy / elapsed if elapsed > 0 else 0.0, 'devices': {}}
+        for entry in list(self.devices.values()):
+            stats['devices'][entry["name"]] = {'target': 1.0 / entry["period"],
+                                               'rate': entry["samples"] / elapsed if elapsed > 0 else 0.0,
+                                               'samples': entry["samples"],
+                                               'missed': entry["missed"],
+                                               'errors': entry["errors"],
+                                               'late': entry["late"] * 1000000,
+                                               'busy': entry["busy"] / elapsed if elapsed > 0 else 0.0}
+        return stats
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Vectorized IMU sample conversion
+-------------
+Convert raw burst buffers of N samples to physical units in one NumPy pass
+instead of per sample Python sign extension, byte swapping and division. The
+raw buffer can be bytes, bytearray, memoryview or a uint8 array (i.e. from
+readInto). Sign extension and endian swap come from the int16 dtype, scaling
+is one multiply into a float32 array. Pass out to reuse a preallocated
+array. Requires NumPy.
+
+values = imuconvert.mpu6050Burst(raw, 16384.0, 131.0)
+"""
+
+import numpy as np
+
+# Standard gravity m/s^2
+gravity = 9.80665
+# ADXL345 full resolution scale g/LSB
+adxl345Scale = 0.0039
+
+
+def convert(raw, dtype, columns, scale, out=None):
+    """Return float32 array of shape (N, columns) of raw int16 values of dtype
+    times scale (one factor per column).
+    """
+    values = np.frombuffer(raw, dtype=dtype)
+    values = values[:len(values) // columns * columns].reshape(-1, columns)
+    if out is None:
+        out = np.empty(values.shape, dtype=np.float32)
+    else:
+        out = out[:len(values)]
+    np.multiply(values, scale, out=out, casting="unsafe")
+    return out
+
+
+def mpu6050Scale(accelScale, gyroScale, g=False, columns=7):
+    """Return float32 scale vector. columns 7 is the 0x3b-0x48 burst layout
+    (accel, temp, gyro), 6 is the FIFO layout (accel, gyro).
+    """
+    accel = (gravity if not g else 1.0) / accelScale
+    if columns == 7:
+        return np.array([accel] * 3 + [1 / 340.0] + [1 / gyroScale] * 3, dtype=np.float32)
+    return np.array([accel] * 3 + [1 / gyroScale] * 3, dtype=np.float32)
+
+
+def mpu6050Burst(raw, accelScale, gyroScale, g=False, out=None):
+    """Convert N 14 byte bursts (0x3b-0x48) to rows of accel x, y, z (m/s^2
+    or g), temperature (ºF) and gyro x, y, z (º/s).
+    """
+    out = convert(raw, ">i2", 7, mpu6050Scale(accelScale, gyroScale, g), out)
+    # ºC = raw / 340 + 36.53, then to ºF like mpu6050.getTemp
+    out[:, 3] = (out[:, 3] + 36.53) * 1.8 + 32
+    return out
+
+
+def mpu6050Fifo(raw, accelScale, gyroScale, g=False, out=None):
+    """Convert N 12 byte FIFO frames to rows of accel x, y, z (m/s^2 or g) and
+    gyro x, y, z (º/s).
+    """
+    return convert(raw, ">i2", 6, mpu6050Scale(accelScale, gyroScale, g, 6), out)
+
+
+def adxl345(raw, dataRange=0, fullRes=True, g=False, out=None):
+    """Convert N 6 byte samples (0x32-0x37, little endian) to rows of x, y, z
+    (m/s^2 or g). dataRange is the DATA_FORMAT range bits (0 is ±2 g).
+    """
+    scale = adxl345Scale if fullRes else adxl345Scale * (1 << dataRange)
+    if not g:
+        scale *= gravity
+    return convert(raw, "<i2", 3, np.float32(scale), out)
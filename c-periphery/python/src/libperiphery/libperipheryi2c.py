@@ -9,16 +9,11 @@ libperipheryi2c CFFI interface for I2C access
 Helper methods added to handle repetitive operations.
 """
 
-from cffi import FFI
+from libperiphery import _loader
 
-
-class libperipheryi2c:
-
-    def __init__(self):
-        self.ffi = FFI()
-        # Specify each C function, struct and constant you want a Python binding for
-        # Copy-n-paste with minor edits
-        self.ffi.cdef("""
+# Specify each C function, struct and constant you want a Python binding for
+# Copy-n-paste with minor edits
+cdef = """
         typedef unsigned char uint8_t;
         typedef unsigned short int uint16_t;
         
@@ -68,8 +63,21 @@ class libperipheryi2c:
         int i2c_errno(i2c_t *i2c);
 
         const char *i2c_errmsg(i2c_t *i2c);
-        """)
-        self.lib = self.ffi.dlopen("/usr/local/lib/libperipheryi2c.so")
+        """
+
+
+def load(api=True):
+    """Return the shared FFI and library, see _loader.load.
+    """
+    return _loader.load("peripheryi2c", cdef, api)
+
+
+class libperipheryi2c:
+
+    def __init__(self):
+        """Use shared FFI and library interfaces.
+        """
+        self.ffi, self.lib = load()
 
     def open(self, device):
         """Open I2C device and return handle.
@@ -133,12 +141,10 @@ class libperipheryi2c:
         return msg2[0]
     
     def readWord(self, handle, addr, reg):
-        """Read two i2c registers and combine them.
+        """Read two i2c registers in one transaction and combine them.
         """
-        high = self.readReg(handle, addr, reg)
-        # Increment register for next read
-        low = self.readReg(handle, addr, reg + 1)
-        value = (high << 8) + low
+        data = self.readArray(handle, addr, reg, 2)
+        value = (data[0] << 8) + data[1]
         if (value >= 0x8000):
             return -((65535 - value) + 1)
         else:
@@ -172,3 +178,67 @@ class libperipheryi2c:
         if self.lib.i2c_transfer(handle, msgs, 2) < 0:
             raise RuntimeError(self.ffi.string(self.lib.i2c_errmsg(handle)).decode('utf-8'))
         return msg2
+
+    def readInto(self, handle, addr, reg, buf):
+        """Read len(buf) bytes starting at reg directly into a writable buffer
+        (bytearray, memoryview, array.array, NumPy array, etc.) without
+        copying. Returns number of bytes read.
+        """
+        data = self.ffi.from_buffer("uint8_t[]", buf, require_writable=True)
+        # Register to read
+        msg1 = self.ffi.new("uint8_t[]", 1)
+        msg1[0] = reg
+        msgs = self.ffi.new("struct i2c_msg[]", 2)
+        msgs[0].addr = addr
+        msgs[0].flags = 0x00
+        msgs[0].len = 1
+        msgs[0].buf = msg1
+        msgs[1].addr = addr
+        msgs[1].flags = self.lib.I2C_M_RD
+        msgs[1].len = len(data)
+        msgs[1].buf = data
+        if self.lib.i2c_transfer(handle, msgs, 2) < 0:
+            raise RuntimeError(self.ffi.string(self.lib.i2c_errmsg(handle)).decode('utf-8'))
+        return len(data)
+
+    def writeFrom(self, handle, addr, buf):
+        """Write any buffer as one message without copying. Put the register
+        (or control byte) first.
+        """
+        data = self.ffi.from_buffer("uint8_t[]", buf)
+        msgs = self.ffi.new("struct i2c_msg[]", 1)
+        msgs[0].addr = addr
+        msgs[0].flags = 0x00
+        msgs[0].len = len(data)
+        msgs[0].buf = data
+        if self.lib.i2c_transfer(handle, msgs, 1) < 0:
+            raise RuntimeError(self.ffi.string(self.lib.i2c_errmsg(handle)).decode('utf-8'))
+
+    def transaction(self, handle, addr, segments):
+        """Transfer list of segments as one transaction with a single
+        i2c_transfer. A write segment is a sequence of bytes (bytes, bytearray,
+        list of ints) and a read segment is the number of bytes to read.
+        Returns list of bytes, one for each read segment.
+
+        values = i2c.transaction(handle, addr, [[0x3b], 6, [0x43], 6])
+        """
+        msgs = self.ffi.new("struct i2c_msg[]", len(segments))
+        # Keep buffers alive until the transfer is done
+        bufs = []
+        reads = []
+        for i, segment in enumerate(segments):
+            msgs[i].addr = addr
+            if isinstance(segment, int):
+                buf = self.ffi.new("uint8_t[]", segment)
+                msgs[i].flags = self.lib.I2C_M_RD
+                msgs[i].len = segment
+                reads.append(buf)
+            else:
+                buf = self.ffi.new("uint8_t[]", list(segment))
+                msgs[i].flags = 0x00
+                msgs[i].len = len(segment)
+            msgs[i].buf = buf
+            bufs.append(buf)
+        if self.lib.i2c_transfer(handle, msgs, len(segments)) < 0:
+            raise RuntimeError(self.ffi.string(self.lib.i2c_errmsg(handle)).decode('utf-8'))
+        return [self.ffi.buffer(buf)[:] for buf in reads]
@@ -9,16 +9,11 @@ libperipheryserial CFFI interface for I2C access
 Helper methods added to handle repetitive operations.
 """
 
-from cffi import FFI
+from libperiphery import _loader
 
-
-class libperipheryserial:
-
-    def __init__(self):
-        self.ffi = FFI()
-        # Specify each C function, struct and constant you want a Python binding for
-        # Copy-n-paste with minor edits
-        self.ffi.cdef("""
+# Specify each C function, struct and constant you want a Python binding for
+# Copy-n-paste with minor edits
+cdef = """
         enum serial_error_code {
             SERIAL_ERROR_ARG            = -1,
             SERIAL_ERROR_OPEN           = -2,
@@ -95,8 +90,21 @@ class libperipheryserial:
         int serial_errno(serial_t *serial);
         
         const char *serial_errmsg(serial_t *serial);
-        """)
-        self.lib = self.ffi.dlopen("/usr/local/lib/libperipheryserial.so")
+        """
+
+
+def load(api=True):
+    """Return the shared FFI and library, see _loader.load.
+    """
+    return _loader.load("peripheryserial", cdef, api)
+
+
+class libperipheryserial:
+
+    def __init__(self):
+        """Use shared FFI and library interfaces.
+        """
+        self.ffi, self.lib = load()
 
     def open(self, device, baudrate):
         """Open serial device and return handle.
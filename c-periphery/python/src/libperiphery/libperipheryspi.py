@@ -9,16 +9,11 @@ libperipheryspi CFFI interface for SPI access
 Helper methods added to handle repetitive operations.
 """
 
-from cffi import FFI
+from libperiphery import _loader
 
-
-class libperipheryspi:
-
-    def __init__(self):
-        self.ffi = FFI()
-        # Specify each C function, struct and constant you want a Python binding for
-        # Copy-n-paste with minor edits
-        self.ffi.cdef("""
+# Specify each C function, struct and constant you want a Python binding for
+# Copy-n-paste with minor edits
+cdef = """
         #define SPI_MODE_0 0x00
         #define SPI_MODE_1 0x01
         #define SPI_MODE_2 0x02
@@ -85,8 +80,21 @@ class libperipheryspi:
         int spi_errno(spi_t *spi);
         
         const char *spi_errmsg(spi_t *spi);
-        """)
-        self.lib = self.ffi.dlopen("/usr/local/lib/libperipheryspi.so")
+        """
+
+
+def load(api=True):
+    """Return the shared FFI and library, see _loader.load.
+    """
+    return _loader.load("peripheryspi", cdef, api)
+
+
+class libperipheryspi:
+
+    def __init__(self):
+        """Use shared FFI and library interfaces.
+        """
+        self.ffi, self.lib = load()
         
     def open(self, device, mode, maxSpeed):
         """Open SPI device and return handle.
@@ -115,4 +123,21 @@ class libperipheryspi:
             raise RuntimeError("tx and rx buffer cannot both be null".decode('utf-8'))
         if self.lib.spi_transfer(handle, txbuf, rxbuf, bufLen) < 0:
             raise RuntimeError(self.ffi.string(self.lib.spi_errmsg(handle)).decode('utf-8'))
-        return rxbuf       
+        return rxbuf
+
+    def transferInto(self, handle, txbuf, rxbuf=None):
+        """Transfer from any buffer (bytes, bytearray, memoryview,
+        array.array, NumPy array, etc.) and receive into a writable buffer
+        without copying. rxbuf None only transmits. Returns number of bytes
+        transferred.
+        """
+        tx = self.ffi.from_buffer("uint8_t[]", txbuf)
+        if rxbuf is None:
+            rx = self.ffi.NULL
+        else:
+            rx = self.ffi.from_buffer("uint8_t[]", rxbuf, require_writable=True)
+            if len(rx) < len(tx):
+                raise RuntimeError("rx buffer of %d bytes smaller than tx buffer of %d" % (len(rx), len(tx)))
+        if self.lib.spi_transfer(handle, tx, rx, len(tx)) < 0:
+            raise RuntimeError(self.ffi.string(self.lib.spi_errmsg(handle)).decode('utf-8'))
+        return len(tx)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Shadow register map
+-------------
+Drivers read configuration registers for read-modify-write updates and to
+pick scale factors on every sample. registermap keeps a shadow copy of the
+configuration registers of one I2C device. Reads come from the shadow after
+the first bus read, writes go through to the device, stage() and flush()
+batch dirty registers and invalidate() forgets values the device may have
+changed (reset, power cycle). Registers in volatile are never cached.
+
+regs = registermap.registermap(i2c, handle, 0x53)
+regs.update(0x31, 0x0f, 0x08)
+"""
+
+
+class registermap:
+
+    def __init__(self, i2c, handle, addr, volatile=()):
+        """i2c is a libperipheryi2c instance and handle an open handle.
+        """
+        self.i2c = i2c
+        self.handle = handle
+        self.addr = addr
+        self.volatile = frozenset(volatile)
+        # Register value by address
+        self.shadow = {}
+        self.dirty = set()
+        self.reads = 0
+        self.writes = 0
+
+    def read(self, reg):
+        """Return register value, from the shadow if cached.
+        """
+        value = self.shadow.get(reg)
+        if value is None:
+            value = self.i2c.readReg(self.handle, self.addr, reg)
+            self.reads += 1
+            if reg not in self.volatile:
+                self.shadow[reg] = value
+        return value
+
+    def write(self, reg, value):
+        """Write register through to device and shadow.
+        """
+        self.i2c.writeReg(self.handle, self.addr, reg, value)
+        self.writes += 1
+        self.dirty.discard(reg)
+        if reg in self.volatile:
+            # Staged volatile registers are dropped once written
+            self.shadow.pop(reg, None)
+        else:
+            self.shadow[reg] = value
+
+    def update(self, reg, mask, value):
+        """Set bits in mask to value. The write is skipped if nothing changes.
+        """
+        old = self.read(reg)
+        new = (old & ~mask) | (value & mask)
+        if new != old or reg in self.dirty:
+            self.write(reg, new)
+
+    def stage(self, reg, value):
+        """Change shadow only, flush writes it. Volatile registers are read
+        from the shadow only until flushed.
+        """
+        self.shadow[reg] = value
+        self.dirty.add(reg)
+
+    def flush(self):
+        """Write dirty registers in address order.
+        """
+        for reg in sorted(self.dirty):
+            self.write(reg, self.shadow[reg])
+
+    def invalidate(self, reg=None):
+        """Forget one or all cached registers. Dirty registers are dropped too.
+        """
+        if reg is None:
+            self.shadow.clear()
+            self.dirty.clear()
+        else:
+            self.shadow.pop(reg, None)
+            self.dirty.discard(reg)
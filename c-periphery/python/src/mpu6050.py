@@ -8,18 +8,45 @@ Triple Axis Accelerometer & Gyro - MPU-6050 sensor example
 This is an example of using the c-periphery I2C bindings.
 """
 
-import sys, time
+import sys, time, struct, queue
 from argparse import *
 from cffi import FFI
-from libperiphery import libperipheryi2c
+from libperiphery import libperipheryi2c, i2cdevice, registermap
 
 
 class mpu6050:
+
+    # ACCEL_XOUT_H to GYRO_ZOUT_L, accel x, y, z, temp, gyro x, y, z
+    burstReg = 0x3b
+    burstStruct = struct.Struct(">7h")
+    # Scale by range register value
+    accelScales = {0x00: 16384.0, 0x08: 8192.0, 0x10: 4096.0, 0x18: 2048.0}
+    gyroScales = {0x00: 131.0, 0x08: 65.5, 0x10: 32.8, 0x18: 16.4}
+    # FIFO holds accel x, y, z and gyro x, y, z frames
+    fifoSize = 1024
+    fifoFrame = 12
     
     def __init__(self):
         """Create library interface.
         """    
         self.i2c = libperipheryi2c.libperipheryi2c()
+        # Reused for every burst read
+        self.burst = bytearray(self.burstStruct.size)
+        # Shadow registers by address
+        self.registerMaps = {}
+        self.fifoBuf = bytearray(self.fifoSize)
+        self.fifoOverflows = 0
+        self.fifoSamples = 0
+
+    def registers(self, handle, addr):
+        """Return shadow registermap of the device at addr. USER_CTRL (0x6a)
+        has self clearing reset bits, so it isn't cached.
+        """
+        regs = self.registerMaps.get(addr)
+        if regs is None or regs.handle is not handle:
+            regs = registermap.registermap(self.i2c, handle, addr, volatile=(0x6a,))
+            self.registerMaps[addr] = regs
+        return regs
 
     def getTemp(self, handle, addr):
         """Reads the temperature from the onboard temperature sensor of the
@@ -39,9 +66,9 @@ class mpu6050:
         range is advised.
         """
         # First change it to 0x00 to make sure we write the correct value later
-        self.i2c.writeReg(handle, addr, 0x1c, 0x00)
+        self.registers(handle, addr).write(0x1c, 0x00)
         # Write the new range to the 0x1c register
-        self.i2c.writeReg(handle, addr, 0x1c, range)
+        self.registers(handle, addr).write(0x1c, range)
         
     def readAccelRange(self, handle, addr, raw=False):
         """Reads the range the accelerometer is set to.
@@ -50,8 +77,8 @@ class mpu6050:
         is False, it will return an integer: -1, 2, 4, 8 or 16. When it returns -1
         something went wrong.
         """
-        # Get the raw value
-        rawData = self.i2c.readReg(handle, addr, 0x1c)
+        # Get the raw value, only read from the device the first time
+        rawData = self.registers(handle, addr).read(0x1c)
         if raw is True:
             return rawData
         elif raw is False:
@@ -107,9 +134,9 @@ class mpu6050:
         is advised.
         """
         # First change it to 0x00 to make sure we write the correct value later
-        self.i2c.writeReg(handle, addr, 0x1b, 0x00)
+        self.registers(handle, addr).write(0x1b, 0x00)
         # Write the new range to the 0x1B register
-        self.i2c.writeReg(handle, addr, 0x1b, gyroRange)
+        self.registers(handle, addr).write(0x1b, gyroRange)
     
     def readGyroRange(self, handle, addr, raw=False):
         """Reads the range the gyroscope is set to.
@@ -118,8 +145,8 @@ class mpu6050:
         is False, it will return 250, 500, 1000, 2000 or -1. If the returned value
         is equal to -1 something went wrong.
         """
-        # Get the raw value
-        rawData = self.i2c.readReg(handle, addr, 0x1b)
+        # Get the raw value, only read from the device the first time
+        rawData = self.registers(handle, addr).read(0x1b)
         if raw is True:
             return rawData
         elif raw is False:
@@ -161,18 +188,163 @@ class mpu6050:
         z = z / gyroScaleModifier
         return {'x': x, 'y': y, 'z': z}
     
+    def getScales(self, handle, addr):
+        """Return (accel scale, gyro scale). The range registers come from the
+        shadow registers, so there's no bus traffic after the first call.
+        """
+        return (self.accelScales.get(self.readAccelRange(handle, addr, True), 16384.0),
+                self.gyroScales.get(self.readGyroRange(handle, addr, True), 131.0))
+
+    def getRawData(self, handle, addr):
+        """Read accel x, y, z, temp and gyro x, y, z registers (0x3b-0x48) in one
+        transaction and return tuple of raw signed values.
+        """
+        self.i2c.readInto(handle, addr, self.burstReg, self.burst)
+        return self.burstStruct.unpack(self.burst)
+
+    def getBurstData(self, handle, addr, g=False, out=None):
+        """Read all sensors in one transaction. Returns tuple of accel x, y, z
+        (m/s^2 or g if g is True), temperature (ºF) and gyro x, y, z (º/s). If
+        out is not None the values are stored in out[0:7] (i.e. a row of a
+        preallocated NumPy array) and out is returned instead.
+        """
+        ax, ay, az, temp, gx, gy, gz = self.getRawData(handle, addr)
+        accelScale, gyroScale = self.getScales(handle, addr)
+        if not g:
+            accelScale /= 9.80665
+        values = (ax / accelScale, ay / accelScale, az / accelScale, 1.8 * ((temp / 340) + 36.53) + 32,
+                  gx / gyroScale, gy / gyroScale, gz / gyroScale)
+        if out is None:
+            return values
+        out[0:7] = values
+        return out
+
     def getAllData(self, handle, addr):
         """Reads and returns all the available data.
         """
-        temp = self.getTemp(handle, addr)
-        accel = self.getAccelData(handle, addr)
-        gyro = self.getGyroData(handle, addr)
-        return [accel, gyro, temp]
+        ax, ay, az, temp, gx, gy, gz = self.getBurstData(handle, addr)
+        return [{'x': ax, 'y': ay, 'z': az}, {'x': gx, 'y': gy, 'z': gz}, temp]
+
+    def startFifo(self, handle, addr, rate):
+        """Set sample rate (4 to 1000 Hz) and start FIFO with accel and gyro
+        frames.
+        """
+        # DLPF 184 Hz, gyro output rate 1 kHz
+        self.registers(handle, addr).write(0x1a, 0x01)
+        self.registers(handle, addr).write(0x19, max(0, min(255, int(1000 / rate) - 1)))
+        # FIFO_OFLOW_EN, FIFO_OFLOW_INT is only set when the interrupt is on
+        self.registers(handle, addr).write(0x38, 0x10)
+        self.resetFifo(handle, addr)
+        # XG, YG, ZG and ACCEL FIFO enable
+        self.registers(handle, addr).write(0x23, 0x78)
+
+    def resetFifo(self, handle, addr):
+        """Empty FIFO and enable it.
+        """
+        self.registers(handle, addr).write(0x6a, 0x04)
+        self.registers(handle, addr).write(0x6a, 0x40)
+
+    def stopFifo(self, handle, addr):
+        self.registers(handle, addr).write(0x23, 0x00)
+        self.registers(handle, addr).write(0x6a, 0x00)
+        self.registers(handle, addr).write(0x38, 0x00)
+
+    def readFifo(self, handle, addr):
+        """Return memoryview of the complete frames in the FIFO. On overflow the
+        FIFO is reset and an empty memoryview is returned since the frames are
+        no longer aligned.
+        """
+        # INT_STATUS and FIFO_COUNT_H/L in one transfer, reading INT_STATUS
+        # clears FIFO_OFLOW_INT
+        status, count = self.i2c.transaction(handle, addr, [[0x3a], 1, [0x72], 2])
+        count = (count[0] << 8) + count[1]
+        # A full FIFO has wrapped or is about to, even if the interrupt was missed
+        if status[0] & 0x10 or count >= self.fifoSize:
+            self.fifoOverflows += 1
+            self.resetFifo(handle, addr)
+            return memoryview(self.fifoBuf)[:0]
+        size = count // self.fifoFrame * self.fifoFrame
+        view = memoryview(self.fifoBuf)[:size]
+        if size:
+            # FIFO_R_W doesn't auto increment, so one read drains size bytes
+            self.i2c.readInto(handle, addr, 0x74, view)
+        return view
+
+    def streamFifo(self, handle, addr, rate=1000, periodSecs=0.05, g=False):
+        """Generator yielding NumPy float32 blocks of shape (samples, 6) with
+        accel x, y, z (m/s^2 or g if g is True) and gyro x, y, z (º/s). The FIFO
+        is drained every periodSecs, at 1 kHz it overflows after 85 ms. Check
+        fifoOverflows for gaps. Requires NumPy.
+        """
+        from libperiphery import imuconvert
+        accelScale, gyroScale = self.getScales(handle, addr)
+        self.startFifo(handle, addr, rate)
+        try:
+            deadline = time.monotonic()
+            while True:
+                deadline += periodSecs
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+                view = self.readFifo(handle, addr)
+                if len(view):
+                    block = imuconvert.mpu6050Fifo(view, accelScale, gyroScale, g)
+                    self.fifoSamples += len(block)
+                    yield block
+        finally:
+            self.stopFifo(handle, addr)
+
+    def startDataReady(self, handle, addr, rate):
+        """Set sample rate (4 to 1000 Hz) and enable the data ready interrupt,
+        cleared by any read.
+        """
+        self.registers(handle, addr).write(0x1a, 0x01)
+        self.registers(handle, addr).write(0x19, max(0, min(255, int(1000 / rate) - 1)))
+        # INT_RD_CLEAR
+        self.registers(handle, addr).write(0x37, 0x10)
+        # DATA_RDY_EN
+        self.registers(handle, addr).write(0x38, 0x01)
+
+    def acquire(self, handle, addr, chip, line, rate=100, secs=5):
+        """Read burst samples on data ready interrupts with INT wired to chip
+        and line. Requires the libgpiod bindings.
+        """
+        from libperiphery import acquisition
+        self.startDataReady(handle, addr, rate)
+        dev = i2cdevice.i2cdevice(None, addr, handle=handle)
+        with acquisition.acquisition(chip, line, dev.readPlan(self.burstReg, self.burstStruct.size), decode=self.burstStruct.unpack) as acq:
+            acq.start()
+            start = time.monotonic()
+            last = None
+            while time.monotonic() - start < secs:
+                try:
+                    timestamp, data = acq.queue.get(timeout=1.0)
+                except queue.Empty:
+                    print("No data ready interrupt")
+                    continue
+                if last is None or timestamp - last >= 1000000000:
+                    last = timestamp
+                    print("%d ns | Raw accel x: %+6d, y: %+6d, z: %+6d | gyro x: %+6d, y: %+6d, z: %+6d" % (timestamp, data[0], data[1], data[2], data[4], data[5], data[6]))
+            print("%d samples in %.1f seconds, %d dropped" % (acq.samples, time.monotonic() - start, acq.dropped))
+        self.registers(handle, addr).write(0x38, 0x00)
 
-    def main(self, device, address):
+    def main(self, device, address, fifo=False, chip=0, line=None):
         handle = self.i2c.open(device)
         # Wake up the MPU-6050 since it starts in sleep mode
-        self.i2c.writeReg(handle, address, 0x6b, 0x00)
+        self.registers(handle, address).write(0x6b, 0x00)
+        if line is not None:
+            self.acquire(handle, address, chip, line)
+            self.i2c.close(handle)
+            return
+        if fifo:
+            start = time.monotonic()
+            for block in self.streamFifo(handle, address):
+                print("%4d samples | Accel mean x: %+5.2f, y: %+5.2f, z: %+5.2f | FIFO overflows %d" % (len(block), block[:, 0].mean(), block[:, 1].mean(), block[:, 2].mean(), self.fifoOverflows))
+                if time.monotonic() - start > 5:
+                    break
+            print("%d samples in %.1f seconds" % (self.fifoSamples, time.monotonic() - start))
+            self.i2c.close(handle)
+            return
         count = 0
         while count < 100:
             all = self.getAllData(handle, address)
@@ -189,9 +361,12 @@ if __name__ == "__main__":
     parser = ArgumentParser()
     parser.add_argument("--device", help="I2C device name (default '/dev/i2c-0')", type=str, default="/dev/i2c-0")
     parser.add_argument("--address", help="MPU-6050 address (default 0x68)", type=str, default="0x68")
+    parser.add_argument("--fifo", help="Stream 1 kHz samples from the FIFO for 5 seconds (requires NumPy)", action="store_true")
+    parser.add_argument("--chip", help="GPIO chip number of INT line (default 0 '/dev/gpiochip0')", type=int, default=0)
+    parser.add_argument("--line", help="GPIO line number wired to INT, reads 100 Hz samples on data ready for 5 seconds (requires libgpiod)", type=int, default=None)
     args = parser.parse_args()
     obj = mpu6050()
     # Convert from hex string to int
     address = int(args.address, 16)
-    obj.main(args.device, address)
+    obj.main(args.device, address, args.fifo, args.chip, args.line)
 
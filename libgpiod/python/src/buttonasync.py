@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Use asyncio to monitor edge events on one or more lines
+-------------
+Should work on any board with a button built in. Just change chip and line
+values as needed. All lines are served from the asyncio event loop thread.
+"""
+
+import sys, time, asyncio
+from argparse import *
+from cffi import FFI
+from libgpiod import libgpiod, lineevents
+
+
+class buttonasync:
+
+    def __init__(self):
+        """Create library and ffi interfaces.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+
+    async def printEvents(self, events):
+        """Print events until iterator is closed.
+        """
+        async for event in events:
+            if event.event_type == self.lib.GPIOD_LINE_EVENT_RISING_EDGE:
+                edge = "Rising "
+            else:
+                edge = "Falling"
+            print("Line %d %s edge timestamp %s.%09d" % (event.offset, edge, time.strftime('%m/%d/%Y %H:%M:%S', time.localtime(event.timestamp // 1000000000)), event.timestamp % 1000000000))
+
+    async def main(self, chip, lines, timeoutSecs):
+        """Print edge events until timeout.
+        """
+        print ("libgpiod version %s" % self.ffi.string(self.lib.gpiod_version_string()).decode('utf-8'))
+        gpiod_chip = self.lib.gpiod_chip_open_by_number(chip)
+        # Verify the chip was opened
+        if gpiod_chip != self.ffi.NULL:
+            print("Name: %s, label: %s, lines: %d" % (self.ffi.string(gpiod_chip.name).decode('utf-8'), self.ffi.string(gpiod_chip.label).decode('utf-8'), gpiod_chip.num_lines))
+            consumer = sys.argv[0][:-3]
+            requested = []
+            for line in lines:
+                gpiod_line = self.lib.gpiod_chip_get_line(gpiod_chip, line)
+                # Verify we have line
+                if gpiod_line == self.ffi.NULL:
+                    print("Unable to get line %d" % line)
+                # Request detection of both edge events
+                elif self.lib.gpiod_line_request_both_edges_events(gpiod_line, consumer.encode('utf-8')) == 0:
+                    requested.append(gpiod_line)
+                else:
+                    print("Unable request both edges for line %d" % line)
+            if requested:
+                with lineevents.lineevents(requested) as events:
+                    print("Press and release button, timeout in %d seconds\n" % timeoutSecs)
+                    try:
+                        await asyncio.wait_for(self.printEvents(events), timeoutSecs)
+                    except asyncio.TimeoutError:
+                        pass
+            for gpiod_line in requested:
+                self.lib.gpiod_line_release(gpiod_line)
+            self.lib.gpiod_chip_close(gpiod_chip)
+        else:
+            print("Unable to open chip %d" % chip)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--chip", help="GPIO chip number (default 1 '/dev/gpiochip1')", type=int, default=1)
+    parser.add_argument("--lines", help="GPIO line numbers (default 3 button on NanoPi Duo)", type=int, nargs="+", default=[3])
+    parser.add_argument("--timeout", help="Seconds to watch lines (default 10)", type=int, default=10)
+    args = parser.parse_args()
+    obj = buttonasync()
+    asyncio.run(obj.main(args.chip, args.lines, args.timeout))
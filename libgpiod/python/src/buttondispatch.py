@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Use one dispatcher thread to monitor edge events on many lines
+-------------
+Should work on any board with a button built in. Just change chip and line
+values as needed. Unlike buttonthread.py there's one thread for all lines and
+handlers run in a small thread pool.
+"""
+
+import sys, time
+from argparse import *
+from concurrent.futures import ThreadPoolExecutor
+from cffi import FFI
+from libgpiod import libgpiod, dispatcher
+
+
+class buttondispatch:
+
+    def __init__(self):
+        """Create library and ffi interfaces.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+
+    def handleEvent(self, event):
+        """Called from thread pool for each edge.
+        """
+        if event.event_type == self.lib.GPIOD_LINE_EVENT_RISING_EDGE:
+            edge = "Rising "
+        else:
+            edge = "Falling"
+        print("Line %d %s edge timestamp %s" % (event.offset, edge, time.strftime('%m/%d/%Y %H:%M:%S', time.localtime(event.timestamp // 1000000000))))
+
+    def main(self, chip, lines, timeoutSecs):
+        """Dispatch edge events while main thread does other stuff.
+        """
+        print ("libgpiod version %s" % self.ffi.string(self.lib.gpiod_version_string()).decode('utf-8'))
+        gpiod_chip = self.lib.gpiod_chip_open_by_number(chip)
+        # Verify the chip was opened
+        if gpiod_chip != self.ffi.NULL:
+            print("Name: %s, label: %s, lines: %d" % (self.ffi.string(gpiod_chip.name).decode('utf-8'), self.ffi.string(gpiod_chip.label).decode('utf-8'), gpiod_chip.num_lines))
+            consumer = sys.argv[0][:-3]
+            executor = ThreadPoolExecutor(max_workers=2)
+            events = dispatcher.dispatcher(executor)
+            requested = []
+            for line in lines:
+                gpiod_line = self.lib.gpiod_chip_get_line(gpiod_chip, line)
+                # Verify we have line
+                if gpiod_line == self.ffi.NULL:
+                    print("Unable to get line %d" % line)
+                # Request detection of both edge events
+                elif self.lib.gpiod_line_request_both_edges_events(gpiod_line, consumer.encode('utf-8')) == 0:
+                    events.register(gpiod_line, self.handleEvent)
+                    requested.append(gpiod_line)
+                else:
+                    print("Unable request both edges for line %d" % line)
+            if requested:
+                events.start()
+                count = 0
+                # Just simulating main program doing something else
+                while count < timeoutSecs:
+                    print("Main program doing stuff, press button")
+                    time.sleep(1)
+                    count += 1
+                events.stop()
+                print("Dispatched %d events, %d handler errors" % (events.events, events.errors))
+            events.close()
+            executor.shutdown()
+            for gpiod_line in requested:
+                self.lib.gpiod_line_release(gpiod_line)
+            self.lib.gpiod_chip_close(gpiod_chip)
+        else:
+            print("Unable to open chip %d" % chip)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--chip", help="GPIO chip number (default 1 '/dev/gpiochip1')", type=int, default=1)
+    parser.add_argument("--lines", help="GPIO line numbers (default 3 button on NanoPi Duo)", type=int, nargs="+", default=[3])
+    parser.add_argument("--timeout", help="Seconds to watch lines (default 30)", type=int, default=30)
+    args = parser.parse_args()
+    obj = buttondispatch()
+    obj.main(args.chip, args.lines, args.timeout)
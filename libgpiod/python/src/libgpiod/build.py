@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Out-of-line API mode build for libgpiod
+-------------
+setup.py uses this to compile libgpiod._libgpiod from the same cdef used in ABI
+mode. Calls go straight to libgpiod instead of through libffi. You can also
+run python libgpiod/build.py in the src dir to build in place.
+
+The compiled module also contains the event ring used by eventring. It's a
+single producer/single consumer ring buffer filled by a C callback for
+gpiod_ctxless_event_loop, so edges don't re-enter Python one at a time.
+"""
+
+import os, sys
+from cffi import FFI
+
+# Make libgpiod package importable when run by setup.py or directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from libgpiod.libgpiod import cdef
+
+# Event ring declarations added to cdef in API mode only
+ringCdef = """
+        struct event_ring_entry {
+            long tv_sec;
+            long tv_nsec;
+            unsigned int offset;
+            int event_type;
+        };
+
+        struct event_ring {
+            struct event_ring_entry *entries;
+            unsigned int size;
+            unsigned int head;
+            unsigned int tail;
+            unsigned long long total;
+            unsigned long long dropped;
+            int stop;
+        };
+
+        int event_ring_cb(int evtype, unsigned int offset,
+                          const struct timespec *ts, void *data);
+
+        unsigned int event_ring_read(struct event_ring *ring,
+                                     struct event_ring_entry *out,
+                                     unsigned int max);
+        """
+
+ffibuilder = FFI()
+# gpiod.h only forward declares gpiod_line and gpiod_chip, so define them the
+# same way libgpiod 1.0 does to keep field access working like ABI mode
+ffibuilder.set_source("libgpiod._libgpiod", """
+#include <gpiod.h>
+
+struct gpiod_line {
+    unsigned int offset;
+    int direction;
+    int active_state;
+    bool used;
+    bool open_source;
+    bool open_drain;
+    int state;
+    bool up_to_date;
+    struct gpiod_chip *chip;
+    int fd;
+    char name[32];
+    char consumer[32];
+};
+
+struct gpiod_chip {
+    struct gpiod_line **lines;
+    unsigned int num_lines;
+    int fd;
+    char name[32];
+    char label[32];
+};
+
+struct event_ring_entry {
+    long tv_sec;
+    long tv_nsec;
+    unsigned int offset;
+    int event_type;
+};
+
+/* size must be a power of 2, head is only written by the event loop thread
+   and tail only by the reader */
+struct event_ring {
+    struct event_ring_entry *entries;
+    unsigned int size;
+    unsigned int head;
+    unsigned int tail;
+    unsigned long long total;
+    unsigned long long dropped;
+    int stop;
+};
+
+/* gpiod_ctxless_event_handle_cb that queues events, data is the ring */
+int event_ring_cb(int evtype, unsigned int offset,
+                  const struct timespec *ts, void *data)
+{
+    struct event_ring *ring = data;
+    unsigned int head, tail;
+    struct event_ring_entry *entry;
+
+    if (evtype != GPIOD_CTXLESS_EVENT_CB_TIMEOUT) {
+        ring->total++;
+        head = ring->head;
+        tail = __atomic_load_n(&ring->tail, __ATOMIC_ACQUIRE);
+        if (head - tail >= ring->size) {
+            ring->dropped++;
+        } else {
+            entry = &ring->entries[head & (ring->size - 1)];
+            entry->tv_sec = ts->tv_sec;
+            entry->tv_nsec = ts->tv_nsec;
+            entry->offset = offset;
+            entry->event_type = evtype == GPIOD_CTXLESS_EVENT_CB_RISING_EDGE ?
+                GPIOD_LINE_EVENT_RISING_EDGE : GPIOD_LINE_EVENT_FALLING_EDGE;
+            __atomic_store_n(&ring->head, head + 1, __ATOMIC_RELEASE);
+        }
+    }
+    return __atomic_load_n(&ring->stop, __ATOMIC_RELAXED) ?
+        GPIOD_CTXLESS_EVENT_CB_RET_STOP : GPIOD_CTXLESS_EVENT_CB_RET_OK;
+}
+
+/* Copy up to max queued events to out and return how many were copied */
+unsigned int event_ring_read(struct event_ring *ring,
+                             struct event_ring_entry *out, unsigned int max)
+{
+    unsigned int head, tail, num, i;
+
+    tail = ring->tail;
+    head = __atomic_load_n(&ring->head, __ATOMIC_ACQUIRE);
+    num = head - tail;
+    if (num > max)
+        num = max;
+    for (i = 0; i < num; i++)
+        out[i] = ring->entries[(tail + i) & (ring->size - 1)];
+    __atomic_store_n(&ring->tail, tail + num, __ATOMIC_RELEASE);
+    return num;
+}
+""", libraries=["gpiod"], library_dirs=["/usr/local/lib"], runtime_library_dirs=["/usr/local/lib"])
+ffibuilder.cdef(cdef + ringCdef)
+
+if __name__ == "__main__":
+    ffibuilder.compile(verbose=True)
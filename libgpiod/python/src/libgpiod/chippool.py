@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Reference counted chip handle pool
+-------------
+Opening a chip for every short GPIO action costs an open and allocating the
+chip and its line array. chippool keeps chips open while they are checked out
+and after the last check in. Chips idle for idleSecs are closed by the next
+checkout or checkin, there's no timer. Chips can be checked out by number,
+name, path or label, all resolve to the same handle. Line handles from
+gpiod_chip_get_line are kept with the chip and reused. All methods are thread
+safe.
+
+with pool.line(0, 203) as line:
+    lib.gpiod_line_request_output(line, consumer, 0)
+    ...
+    lib.gpiod_line_release(line)
+"""
+
+import threading, time
+from contextlib import contextmanager
+from libgpiod import libgpiod
+
+
+class chippool:
+
+    def __init__(self, idleSecs=60.0):
+        """Chips with no references for idleSecs are closed on the next
+        checkout or checkin.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        self.idleSecs = idleSecs
+        self.lock = threading.Lock()
+        # Entries by chip name
+        self.chips = {}
+        # Chip name by checkout key
+        self.aliases = {}
+        self.closed = False
+
+    def open(self, key):
+        """Open chip by number or lookup string.
+        """
+        if isinstance(key, int):
+            chip = self.lib.gpiod_chip_open_by_number(key)
+        else:
+            # Handles name, path, label and number as string
+            chip = self.lib.gpiod_chip_open_lookup(key.encode('utf-8'))
+        if chip == self.ffi.NULL:
+            raise RuntimeError("Unable to open chip %s" % key)
+        return chip
+
+    def chipName(self, chip):
+        return self.ffi.string(self.lib.gpiod_chip_name(chip)).decode('utf-8')
+
+    def checkout(self, key):
+        """Return open chip and add a reference. Every checkout needs a
+        checkin.
+        """
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Chip pool is closed")
+            self.evictIdle()
+            entry = self.chips.get(self.aliases.get(key))
+            if entry is None:
+                chip = self.open(key)
+                name = self.chipName(chip)
+                entry = self.chips.get(name)
+                if entry is None:
+                    entry = {"chip": chip, "refs": 0, "idle": 0.0, "lines": {}}
+                    self.chips[name] = entry
+                else:
+                    # Already open under another key
+                    self.lib.gpiod_chip_close(chip)
+                self.aliases[key] = name
+            entry["refs"] += 1
+            return entry["chip"]
+
+    def checkin(self, chip):
+        """Remove reference added by checkout. After close the chip is closed
+        when its last reference is checked in.
+        """
+        with self.lock:
+            name = self.chipName(chip)
+            entry = self.chips[name]
+            if entry["refs"] <= 0:
+                raise RuntimeError("Chip %s checked in more times than checked out" % name)
+            entry["refs"] -= 1
+            if entry["refs"] == 0:
+                entry["idle"] = time.monotonic()
+                if self.closed:
+                    self.closeEntry(name)
+            self.evictIdle()
+
+    def getLine(self, chip, offset):
+        """Return line of a checked out chip. Handles are cached and reused.
+        """
+        with self.lock:
+            lines = self.chips[self.chipName(chip)]["lines"]
+            line = lines.get(offset)
+            if line is None:
+                line = self.lib.gpiod_chip_get_line(chip, offset)
+                if line == self.ffi.NULL:
+                    raise RuntimeError("Unable to get line %d" % offset)
+                lines[offset] = line
+            return line
+
+    @contextmanager
+    def borrow(self, key):
+        """Check out chip for the with block.
+        """
+        chip = self.checkout(key)
+        try:
+            yield chip
+        finally:
+            self.checkin(chip)
+
+    @contextmanager
+    def line(self, key, offset):
+        """Check out chip and return line for the with block. Release the line
+        before the block ends.
+        """
+        chip = self.checkout(key)
+        try:
+            yield self.getLine(chip, offset)
+        finally:
+            self.checkin(chip)
+
+    def evictIdle(self):
+        """Close chips that have been idle for idleSecs. Caller holds lock.
+        """
+        now = time.monotonic()
+        for name, entry in list(self.chips.items()):
+            if entry["refs"] == 0 and now - entry["idle"] >= self.idleSecs:
+                self.closeEntry(name)
+
+    def closeEntry(self, name):
+        entry = self.chips.pop(name)
+        self.lib.gpiod_chip_close(entry["chip"])
+        for key in [key for key, value in self.aliases.items() if value == name]:
+            del self.aliases[key]
+
+    def close(self):
+        """Stop checkouts and close chips that aren't checked out. Chips still
+        checked out are closed by their last checkin.
+        """
+        with self.lock:
+            self.closed = True
+            for name, entry in list(self.chips.items()):
+                if entry["refs"] == 0:
+                    self.closeEntry(name)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Batched debounce and glitch filter
+-------------
+Buttons and relays bounce, so one press can be dozens of edges and each one
+wakes a handler. debounce takes batches of lineevents (eventring.poll,
+lineevents, dispatcher handlers, etc.) and only passes on settled transitions.
+An edge is settled when no other edge on the same line follows it within
+stableSecs (kernel timestamps). A burst that ends at the level it started at
+is a glitch and nothing is passed on. Lines are filtered independently.
+
+The last edge of a burst can't be settled until stableSecs have gone by, so
+keep calling process (an empty batch is fine) or call flush.
+
+events = debounce.debounce(handler, stableSecs=0.02)
+while True:
+    events.process(ring.poll())
+    time.sleep(0.01)
+"""
+
+import time
+from libgpiod import libgpiod
+
+
+class debounce:
+
+    def __init__(self, handler=None, stableSecs=0.01, eventType=None):
+        """handler is called with each settled lineevent. eventType
+        GPIOD_LINE_EVENT_RISING_EDGE or GPIOD_LINE_EVENT_FALLING_EDGE only
+        passes on that edge, None passes on both.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        self.handler = handler
+        self.stableSecs = stableSecs
+        self.stableNs = int(stableSecs * 1000000000)
+        self.eventType = eventType
+        # (lineevent, monotonic time received) waiting to settle by offset
+        self.pending = {}
+        # Last settled event_type by offset
+        self.levels = {}
+        self.received = 0
+        self.settled = 0
+        self.delivered = 0
+
+    @property
+    def suppressed(self):
+        """Raw events that will never be passed on.
+        """
+        return self.received - self.delivered - len(self.pending) - self.filtered
+
+    @property
+    def filtered(self):
+        """Settled edges not passed on because of eventType.
+        """
+        return self.settled - self.delivered
+
+    def settle(self, event, out):
+        """Record settled edge and add it to out if it's a transition.
+        """
+        if self.levels.get(event.offset) == event.event_type:
+            return
+        self.levels[event.offset] = event.event_type
+        self.settled += 1
+        if self.eventType is None or event.event_type == self.eventType:
+            self.delivered += 1
+            out.append(event)
+
+    def process(self, events):
+        """Filter batch of lineevents in timestamp order. Returns list of
+        settled events, each is also passed to handler if not None.
+        """
+        out = []
+        now = time.monotonic()
+        pending = self.pending
+        stableNs = self.stableNs
+        rising = self.lib.GPIOD_LINE_EVENT_RISING_EDGE
+        falling = self.lib.GPIOD_LINE_EVENT_FALLING_EDGE
+        for event in events:
+            last = pending.get(event.offset)
+            if last is None:
+                # Level before first edge is the opposite of the edge
+                if event.offset not in self.levels:
+                    self.levels[event.offset] = falling if event.event_type == rising else rising
+            elif event.timestamp - last[0].timestamp >= stableNs:
+                self.settle(last[0], out)
+            pending[event.offset] = (event, now)
+        self.received += len(events)
+        # Lines quiet for stableSecs
+        for offset, (event, received) in list(pending.items()):
+            if now - received >= self.stableSecs:
+                del pending[offset]
+                self.settle(event, out)
+        self.deliver(out)
+        return out
+
+    def flush(self):
+        """Settle pending edges now. Returns list of settled events.
+        """
+        out = []
+        for event, received in self.pending.values():
+            self.settle(event, out)
+        self.pending.clear()
+        self.deliver(out)
+        return out
+
+    def deliver(self, out):
+        if self.handler is not None:
+            for event in out:
+                self.handler(event)
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Single thread edge event dispatcher
+-------------
+Watch any number of lines from one thread using epoll over the line event fds
+instead of one thread per line. All events queued for a line are read with
+one read and each is routed to the handler registered for that line. Pass a
+concurrent.futures executor (i.e. ThreadPoolExecutor) so slow handlers don't
+hold up event collection. Handlers for the same line may then run out of
+order, use max_workers=1 if order matters.
+
+Handlers are called with a lineevents.lineevent.
+"""
+
+import os, select, threading
+from libgpiod import libgpiod
+from libgpiod.lineevents import lineevent, eventStruct, fifoDepth
+
+
+class dispatcher:
+
+    def __init__(self, executor=None):
+        """Create epoll instance. Handlers run in the dispatcher thread if
+        executor is None.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        self.executor = executor
+        self.epoll = select.epoll()
+        # Pipe used to wake up epoll when stopping
+        self.wakeRead, self.wakeWrite = os.pipe()
+        self.epoll.register(self.wakeRead, select.EPOLLIN)
+        # (offset, handler) by event fd
+        self.lines = {}
+        self.thread = None
+        self.running = False
+        self.lock = threading.Lock()
+        self.events = 0
+        self.errors = 0
+
+    def register(self, line, handler):
+        """Route events for line to handler. line must already be requested for
+        edge events. Registering a line again replaces its handler. Can be
+        called while running.
+        """
+        fd = self.lib.gpiod_line_event_get_fd(line)
+        if fd < 0:
+            raise RuntimeError("Line %d not requested for events" % self.lib.gpiod_line_offset(line))
+        registered = fd in self.lines
+        self.lines[fd] = (self.lib.gpiod_line_offset(line), handler)
+        if not registered:
+            self.epoll.register(fd, select.EPOLLIN)
+
+    def unregister(self, line):
+        """Stop routing events for line.
+        """
+        fd = self.lib.gpiod_line_event_get_fd(line)
+        if self.lines.pop(fd, None) is not None:
+            self.epoll.unregister(fd)
+
+    def start(self):
+        """Start dispatcher thread.
+        """
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop dispatcher thread and wait for it to exit.
+        """
+        if self.thread is not None:
+            self.running = False
+            os.write(self.wakeWrite, b"\0")
+            self.thread.join()
+            self.thread = None
+
+    def close(self):
+        """Stop and free epoll instance. Lines are not released.
+        """
+        self.stop()
+        self.epoll.close()
+        os.close(self.wakeRead)
+        os.close(self.wakeWrite)
+
+    def run(self):
+        """Wait for events and dispatch them until stopped.
+        """
+        size = eventStruct.size * fifoDepth
+        rising = self.lib.GPIOD_LINE_EVENT_RISING_EDGE
+        falling = self.lib.GPIOD_LINE_EVENT_FALLING_EDGE
+        while self.running:
+            for fd, mask in self.epoll.poll():
+                if fd == self.wakeRead:
+                    os.read(self.wakeRead, 1)
+                    continue
+                entry = self.lines.get(fd)
+                # Unregistered after poll returned
+                if entry is None:
+                    continue
+                offset, handler = entry
+                try:
+                    data = os.read(fd, size)
+                except OSError:
+                    self.countError()
+                    self.lines.pop(fd, None)
+                    self.epoll.unregister(fd)
+                    continue
+                for timestamp, eventId in eventStruct.iter_unpack(data):
+                    self.dispatch(handler, lineevent(offset, rising if eventId == 1 else falling, timestamp))
+
+    def dispatch(self, handler, event):
+        """Call handler directly or hand it to the executor.
+        """
+        self.events += 1
+        if self.executor is None:
+            try:
+                handler(event)
+            except Exception:
+                self.countError()
+        else:
+            self.executor.submit(handler, event).add_done_callback(self.done)
+
+    def done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.countError()
+
+    def countError(self):
+        # Executor threads report errors too
+        with self.lock:
+            self.errors += 1
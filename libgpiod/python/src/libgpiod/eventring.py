@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Native event ring for context less event loops
+-------------
+Passing an ffi.callback to gpiod_ctxless_event_loop means every edge takes the
+GIL and builds Python objects before control goes back to C. eventring runs
+gpiod_ctxless_event_loop_multiple in a thread with a C callback that queues
+events in a preallocated ring buffer. Python gets the events in batches with
+poll() or with a batch callback called every period seconds.
+
+This needs the compiled API mode module (see build.py), it isn't available in
+ABI mode.
+
+ring = eventring.eventring("/dev/gpiochip0", [203], "consumer")
+ring.start(callback=handleBatch)
+"""
+
+import threading
+from libgpiod import libgpiod
+from libgpiod.lineevents import lineevent
+
+
+class eventring:
+
+    def __init__(self, device, offsets, consumer, size=4096, batchSize=256, timeoutSecs=0.1, activeLow=False):
+        """Allocate ring for size events (rounded up to a power of 2). The event
+        loop checks for stop at least every timeoutSecs.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        if not hasattr(self.lib, "event_ring_cb"):
+            raise RuntimeError("eventring requires the API mode libgpiod._libgpiod module, see build.py")
+        self.device = device.encode('utf-8')
+        self.consumer = consumer.encode('utf-8')
+        self.offsets = self.ffi.new("unsigned int[]", offsets)
+        self.activeLow = activeLow
+        ringSize = 1
+        while ringSize < size:
+            ringSize <<= 1
+        self.entries = self.ffi.new("struct event_ring_entry[]", ringSize)
+        self.ring = self.ffi.new("struct event_ring*")
+        self.ring.entries = self.entries
+        self.ring.size = ringSize
+        # poll() copies events here
+        self.batch = self.ffi.new("struct event_ring_entry[]", batchSize)
+        self.timespec = self.ffi.new("struct timespec*")
+        self.timespec.tv_sec = int(timeoutSecs)
+        self.timespec.tv_nsec = int((timeoutSecs - int(timeoutSecs)) * 1000000000)
+        self.loopThread = None
+        self.batchThread = None
+        self.stopped = threading.Event()
+        self.rc = None
+        self.batches = 0
+        self.polled = 0
+        self.maxBatch = 0
+
+    @property
+    def total(self):
+        """Events seen by the C callback.
+        """
+        return self.ring.total
+
+    @property
+    def dropped(self):
+        """Events lost because the ring was full.
+        """
+        return self.ring.dropped
+
+    @property
+    def meanBatch(self):
+        """Mean number of events per non empty batch.
+        """
+        return self.polled / self.batches if self.batches else 0.0
+
+    def runLoop(self):
+        """Runs in loop thread, the GIL is released while in C.
+        """
+        self.rc = self.lib.gpiod_ctxless_event_loop_multiple(self.device, self.offsets, len(self.offsets), self.activeLow,
+                                                             self.consumer, self.timespec, self.ffi.NULL,
+                                                             self.ffi.addressof(self.lib, "event_ring_cb"), self.ring)
+        self.stopped.set()
+
+    def runBatches(self, callback, period):
+        """Runs in batch thread calling callback with each non empty batch.
+        """
+        while True:
+            stopped = self.stopped.wait(period)
+            # Drain what's left after the loop stops
+            batch = self.poll()
+            while batch:
+                callback(batch)
+                batch = self.poll()
+            if stopped:
+                break
+
+    def start(self, callback=None, period=0.01):
+        """Start event loop thread. If callback is not None it's called from
+        another thread with a list of lineevents every period seconds while
+        there are events.
+        """
+        self.ring.stop = 0
+        self.stopped.clear()
+        self.loopThread = threading.Thread(target=self.runLoop, daemon=True)
+        self.loopThread.start()
+        if callback is not None:
+            self.batchThread = threading.Thread(target=self.runBatches, args=(callback, period,), daemon=True)
+            self.batchThread.start()
+
+    def stop(self):
+        """Stop event loop and batch threads. Events still in the ring can be
+        read with poll().
+        """
+        self.ring.stop = 1
+        if self.loopThread is not None:
+            self.loopThread.join()
+            self.loopThread = None
+        if self.batchThread is not None:
+            self.batchThread.join()
+            self.batchThread = None
+        if self.rc is not None and self.rc != 0:
+            raise RuntimeError("gpiod_ctxless_event_loop_multiple error, check device and offsets")
+
+    def poll(self):
+        """Return list of up to batchSize queued lineevents. The ring has a
+        single reader, so don't call this while a batch callback is running.
+        """
+        num = self.lib.event_ring_read(self.ring, self.batch, len(self.batch))
+        if num > 0:
+            self.batches += 1
+            self.polled += num
+            if num > self.maxBatch:
+                self.maxBatch = num
+        batch = self.batch
+        return [lineevent(batch[i].offset, batch[i].event_type, batch[i].tv_sec * 1000000000 + batch[i].tv_nsec) for i in range(num)]
@@ -5,8 +5,9 @@
 """
 libgpiod CFFI interface
 -------------
-Not 100% of the gpiod.h made it through cdef, but the missing functions can be
-replicated in Python if needed:
+Not 100% of the gpiod.h made it through cdef. The missing bulk functions are
+replicated in Python as helper methods (lineBulkInit, lineBulkAdd,
+lineBulkGetLine and lineBulkNumLines):
 
 o static inline void gpiod_line_bulk_init(struct gpiod_line_bulk *bulk)
 o static inline void gpiod_line_bulk_add(struct gpiod_line_bulk *bulk,
@@ -16,16 +17,12 @@ o static inline unsigned int gpiod_line_bulk_num_lines(struct gpiod_line_bulk *b
 If there's anything else missing or problems please put in an issue on GitHub.
 """
 
+import threading
 from cffi import FFI
 
-
-class libgpiod:
-
-    def __init__(self):
-        self.ffi = FFI()
-        # Specify each C function, struct and constant you want a Python binding for
-        # Copy-n-paste with minor edits
-        self.ffi.cdef("""
+# Specify each C function, struct and constant you want a Python binding for
+# Copy-n-paste with minor edits
+cdef = """
         enum {
             GPIOD_CTXLESS_EVENT_CB_TIMEOUT,
             GPIOD_CTXLESS_EVENT_CB_RISING_EDGE,
@@ -363,5 +360,82 @@ class libgpiod:
         gpiod_line_iter_next(struct gpiod_line_iter *iter);
         
         const char *gpiod_version_string(void);
-        """)
-        self.lib = self.ffi.dlopen("libgpiod.so")
+        """
+
+# FFI and library shared by every libgpiod instance in the process keyed by api
+_loaded = {}
+_lock = threading.Lock()
+# Line name index shared by findLine
+_index = None
+
+
+def load(api=True):
+    """Return the shared FFI and library. The compiled API mode module built by
+    setup.py is used if present, otherwise cdef is parsed and the library is
+    opened in ABI mode. Pass api=False to force ABI mode. Either way this only
+    happens on the first call.
+    """
+    if api not in _loaded:
+        with _lock:
+            # Another thread may have loaded it while we waited
+            if api not in _loaded:
+                loaded = None
+                if api:
+                    try:
+                        from libgpiod._libgpiod import ffi, lib
+                        loaded = (ffi, lib)
+                    except ImportError:
+                        # No compiler when installed, so share ABI mode
+                        loaded = _loaded.get(False)
+                if loaded is None:
+                    ffi = FFI()
+                    ffi.cdef(cdef)
+                    loaded = (ffi, ffi.dlopen("libgpiod.so"))
+                    _loaded[False] = loaded
+                _loaded[api] = loaded
+    return _loaded[api]
+
+
+class libgpiod:
+
+    def __init__(self):
+        """Use shared FFI and library interfaces.
+        """
+        self.ffi, self.lib = load()
+
+    def lineBulkInit(self, bulk):
+        """Python version of gpiod_line_bulk_init.
+        """
+        bulk.num_lines = 0
+
+    def lineBulkAdd(self, bulk, line):
+        """Python version of gpiod_line_bulk_add.
+        """
+        if bulk.num_lines >= self.lib.GPIOD_LINE_BULK_MAX_LINES:
+            raise RuntimeError("Line bulk can only hold %d lines" % self.lib.GPIOD_LINE_BULK_MAX_LINES)
+        bulk.lines[bulk.num_lines] = line
+        bulk.num_lines += 1
+
+    def lineBulkGetLine(self, bulk, offset):
+        """Python version of gpiod_line_bulk_get_line.
+        """
+        return bulk.lines[offset]
+
+    def lineBulkNumLines(self, bulk):
+        """Python version of gpiod_line_bulk_num_lines.
+        """
+        return bulk.num_lines
+
+    def findLine(self, name):
+        """Return (chip name, offset) for line name or None if not found. Uses a
+        process wide lineindex instead of walking every chip like
+        gpiod_ctxless_find_line.
+        """
+        global _index
+        if _index is None:
+            # Imported here since lineindex imports this module
+            from libgpiod import lineindex
+            with _lock:
+                if _index is None:
+                    _index = lineindex.lineindex()
+        return _index.findLine(name)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Line bulk
+-------------
+Wraps struct gpiod_line_bulk so up to 64 lines on one chip can be requested,
+set and read with a single call. values is a reusable int array, so updating
+values in place and calling setValues() doesn't allocate anything.
+
+bulk = linebulk.linebulk([line1, line2, line3])
+bulk.requestOutput("consumer")
+bulk.setValues([1, 0, 1])
+"""
+
+from libgpiod import libgpiod
+
+
+class linebulk:
+
+    def __init__(self, lines):
+        """Build bulk from gpiod_line pointers. All lines must belong to the
+        same chip.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        self.bulk = self.ffi.new("struct gpiod_line_bulk*")
+        self.gpiod.lineBulkInit(self.bulk)
+        for line in lines:
+            self.gpiod.lineBulkAdd(self.bulk, line)
+        self.values = self.ffi.new("int[]", self.bulk.num_lines)
+
+    def __len__(self):
+        return self.bulk.num_lines
+
+    def line(self, index):
+        """Return gpiod_line at index.
+        """
+        return self.gpiod.lineBulkGetLine(self.bulk, index)
+
+    def offsets(self):
+        """Return list of line offsets.
+        """
+        return [self.lib.gpiod_line_offset(self.bulk.lines[i]) for i in range(self.bulk.num_lines)]
+
+    def check(self, rc, action):
+        if rc < 0:
+            raise RuntimeError("Unable to %s lines %s" % (action, self.offsets()))
+
+    def requestInput(self, consumer, flags=0):
+        """Request all lines as inputs.
+        """
+        self.check(self.lib.gpiod_line_request_bulk_input_flags(self.bulk, consumer.encode('utf-8'), flags), "request input")
+
+    def requestOutput(self, consumer, defaults=None, flags=0):
+        """Request all lines as outputs. defaults is a sequence of initial
+        values, all lines start at 0 if None.
+        """
+        self.values[0:len(self)] = defaults if defaults is not None else [0] * len(self)
+        self.check(self.lib.gpiod_line_request_bulk_output_flags(self.bulk, consumer.encode('utf-8'), flags, self.values), "request output")
+
+    def requestEvents(self, consumer, requestType=None, flags=0):
+        """Request edge events for all lines. requestType is one of the
+        GPIOD_LINE_REQUEST_EVENT_* constants, both edges if None.
+        """
+        config = self.ffi.new("struct gpiod_line_request_config*")
+        consumerBytes = self.ffi.new("char[]", consumer.encode('utf-8'))
+        config.consumer = consumerBytes
+        config.request_type = self.lib.GPIOD_LINE_REQUEST_EVENT_BOTH_EDGES if requestType is None else requestType
+        config.flags = flags
+        self.check(self.lib.gpiod_line_request_bulk(self.bulk, config, self.ffi.NULL), "request events for")
+
+    def release(self):
+        """Release all lines.
+        """
+        self.lib.gpiod_line_release_bulk(self.bulk)
+
+    def setValues(self, values=None):
+        """Set all lines with one call. If values is None the current contents
+        of self.values are used.
+        """
+        if values is not None:
+            self.values[0:len(self)] = values
+        self.check(self.lib.gpiod_line_set_value_bulk(self.bulk, self.values), "set values of")
+
+    def getValues(self):
+        """Read all lines with one call into self.values and return it.
+        """
+        self.check(self.lib.gpiod_line_get_value_bulk(self.bulk, self.values), "get values of")
+        return self.values
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+asyncio edge events
+-------------
+Each requested line has an event file descriptor. Registering them with
+loop.add_reader lets one thread serve any number of lines without per line
+threads or wait timeouts. Lines must already be requested for edge events.
+
+async for event in lineevents.lineevents([line1, line2]):
+    print(event.offset, event.event_type, event.timestamp)
+"""
+
+import asyncio, collections, struct
+from libgpiod import libgpiod
+
+# Edge event with kernel timestamp in nanoseconds
+lineevent = collections.namedtuple("lineevent", ["offset", "event_type", "timestamp"])
+# Kernel struct gpioevent_data read from a line event fd, id is 1 for rising
+# and 2 for falling edge
+eventStruct = struct.Struct("=QI4x")
+# Line event FIFO depth in the kernel
+fifoDepth = 16
+
+
+class lineevents:
+
+    def __init__(self, lines=(), loop=None, maxsize=0):
+        """Register lines with loop, by default the running loop, so create
+        lineevents in a coroutine. Events are queued until the iterator reads
+        them. If maxsize is > 0 events that don't fit in the queue are counted
+        in dropped.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        self.loop = loop if loop is not None else asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        # Reused for every read
+        self.event = self.ffi.new("struct gpiod_line_event*")
+        # Line offset by event fd
+        self.fds = {}
+        self.dropped = 0
+        self.closed = False
+        for line in lines:
+            self.add(line)
+
+    def add(self, line):
+        """Start watching line.
+        """
+        fd = self.lib.gpiod_line_event_get_fd(line)
+        if fd < 0:
+            raise RuntimeError("Line %d not requested for events" % self.lib.gpiod_line_offset(line))
+        self.fds[fd] = self.lib.gpiod_line_offset(line)
+        self.loop.add_reader(fd, self.read, fd)
+
+    def remove(self, line):
+        """Stop watching line. Events already queued are still delivered.
+        """
+        fd = self.lib.gpiod_line_event_get_fd(line)
+        if self.fds.pop(fd, None) is not None:
+            self.loop.remove_reader(fd)
+
+    def read(self, fd):
+        """Called by the event loop when fd has an event.
+        """
+        if self.lib.gpiod_line_event_read_fd(fd, self.event) == 0:
+            self.put(lineevent(self.fds[fd], self.event.event_type, self.event.ts.tv_sec * 1000000000 + self.event.ts.tv_nsec))
+        else:
+            # Stop watching and hand error to the iterator
+            self.loop.remove_reader(fd)
+            offset = self.fds.pop(fd)
+            self.put(RuntimeError("gpiod_line_event_read_fd error on line %d" % offset))
+
+    def put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def close(self):
+        """Remove all lines from the event loop and end iteration once the queue
+        is empty. Lines are not released.
+        """
+        if not self.closed:
+            for fd in self.fds:
+                self.loop.remove_reader(fd)
+            self.fds.clear()
+            self.closed = True
+            # Wake up iterator waiting on an empty queue
+            if self.queue.empty():
+                self.queue.put_nowait(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed and self.queue.empty():
+            raise StopAsyncIteration
+        item = await self.queue.get()
+        if item is None:
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            raise item
+        return item
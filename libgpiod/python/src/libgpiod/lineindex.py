@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Line name index
+-------------
+gpiod_ctxless_find_line and gpiod_line_find open every chip and walk every
+line on each lookup. lineindex walks them once with gpiod_chip_iter and
+gpiod_line_iter and keeps a name to (chip name, offset) map in memory and
+optionally in a JSON file. The index is rebuilt when the set of /dev/gpiochip*
+devices changes.
+
+index = lineindex.lineindex("/var/cache/lineindex.json")
+chipName, offset = index.findLine("PA4")
+"""
+
+import os, json, threading, time
+from libgpiod import libgpiod
+
+
+class lineindex:
+
+    def __init__(self, cacheFile=None, checkSecs=1.0):
+        """Index is built on first lookup. If cacheFile is not None the index is
+        loaded from and saved to it. Devices are checked for changes at most
+        every checkSecs.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        self.cacheFile = cacheFile
+        self.checkSecs = checkSecs
+        self.lock = threading.Lock()
+        self.lines = None
+        self.devices = None
+        self.lastCheck = 0.0
+
+    def deviceSignature(self):
+        """Return sorted list of [name, device number] for /dev/gpiochip*.
+        """
+        devices = []
+        for name in os.listdir("/dev"):
+            if name.startswith("gpiochip"):
+                try:
+                    devices.append([name, os.stat(os.path.join("/dev", name)).st_rdev])
+                except OSError:
+                    pass
+        return sorted(devices)
+
+    def build(self):
+        """Return name to [chip name, offset] map of every named line. If a
+        name is used more than once the first line found wins like
+        gpiod_line_find.
+        """
+        lines = {}
+        chipIter = self.lib.gpiod_chip_iter_new()
+        if chipIter == self.ffi.NULL:
+            raise RuntimeError("Unable to iterate GPIO chips")
+        try:
+            # gpiod_chip_iter_next closes the previous chip
+            chip = self.lib.gpiod_chip_iter_next(chipIter)
+            while chip != self.ffi.NULL:
+                chipName = self.ffi.string(self.lib.gpiod_chip_name(chip)).decode('utf-8')
+                lineIter = self.lib.gpiod_line_iter_new(chip)
+                if lineIter == self.ffi.NULL:
+                    raise RuntimeError("Unable to iterate lines of %s" % chipName)
+                line = self.lib.gpiod_line_iter_next(lineIter)
+                while line != self.ffi.NULL:
+                    name = self.lib.gpiod_line_name(line)
+                    if name != self.ffi.NULL:
+                        lines.setdefault(self.ffi.string(name).decode('utf-8'), [chipName, self.lib.gpiod_line_offset(line)])
+                    line = self.lib.gpiod_line_iter_next(lineIter)
+                self.lib.gpiod_line_iter_free(lineIter)
+                chip = self.lib.gpiod_chip_iter_next(chipIter)
+        finally:
+            self.lib.gpiod_chip_iter_free(chipIter)
+        return lines
+
+    def load(self, devices):
+        """Return lines from cache file or None if missing or stale.
+        """
+        try:
+            with open(self.cacheFile) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cache.get("devices") != devices:
+            return None
+        return cache.get("lines")
+
+    def save(self, devices, lines):
+        """Write cache file. A failed write only costs a rebuild next time.
+        """
+        tmpFile = "%s.%d" % (self.cacheFile, os.getpid())
+        try:
+            with open(tmpFile, "w") as f:
+                json.dump({"devices": devices, "lines": lines}, f)
+            os.replace(tmpFile, self.cacheFile)
+        except OSError:
+            pass
+
+    def refresh(self, force=False):
+        """Rebuild index if devices changed since it was built.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if not force and self.lines is not None and now - self.lastCheck < self.checkSecs:
+                return
+            self.lastCheck = now
+            devices = self.deviceSignature()
+            if not force and self.lines is not None and devices == self.devices:
+                return
+            lines = None
+            if not force and self.cacheFile is not None:
+                lines = self.load(devices)
+            if lines is None:
+                lines = self.build()
+                if self.cacheFile is not None:
+                    self.save(devices, lines)
+            self.lines = lines
+            self.devices = devices
+
+    def findLine(self, name):
+        """Return (chip name, offset) for line name or None if not found.
+        """
+        self.refresh()
+        entry = self.lines.get(name)
+        return None if entry is None else tuple(entry)
+
+    def names(self):
+        """Return all indexed line names.
+        """
+        self.refresh()
+        return list(self.lines)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Pulse width, frequency and duty cycle measurement
+-------------
+Measure flow meters, fan tachometers, ultrasonic echo pulses, etc. from the
+kernel edge timestamps (ns) instead of converting one gpiod_line_event at a
+time. pulsemeter drains events with eventbuffer and keeps the last windowSecs
+of edges. measure and windows work on any timestamp and event_type arrays
+(i.e. eventbuffer.events) using only NumPy array operations. Requires NumPy.
+
+Rising edges give the period and frequency, a rising edge followed by a
+falling edge gives the pulse width (high time). Request the line for rising
+edges only if only frequency is needed.
+
+meter = pulsemeter.pulsemeter(line, windowSecs=1.0)
+while True:
+    meter.update(timeout=1.0)
+    print(meter.stats())
+"""
+
+import numpy as np
+from libgpiod import libgpiod
+from libgpiod.eventbuffer import eventbuffer
+
+# Row returned by windows, frequency in Hz and width in us
+windowdtype = np.dtype([("start", "i8"), ("edges", "i4"), ("frequency", "f8"), ("width", "f8"), ("duty", "f8")])
+
+
+def pulses(timestamps, types):
+    """Return rising edge timestamps and the start and width (ns) of every high
+    pulse. A rising edge without a falling edge before the next rising edge
+    (missed edge or pulse still high) has no pulse.
+    """
+    ffi, lib = libgpiod.load()
+    rising = timestamps[types == lib.GPIOD_LINE_EVENT_RISING_EDGE]
+    falling = timestamps[types == lib.GPIOD_LINE_EVENT_FALLING_EDGE]
+    # First falling edge after each rising edge
+    index = np.searchsorted(falling, rising, side="right")
+    valid = index < len(falling)
+    nextRising = np.append(rising[1:], np.iinfo(np.int64).max)
+    valid[valid] &= falling[index[valid]] < nextRising[valid]
+    starts = rising[valid]
+    return rising, starts, falling[index[valid]] - starts
+
+
+def measure(timestamps, types):
+    """Return dict with edge count, frequency (Hz), period and width mean, min,
+    max and standard deviation (us) and duty cycle (0-1) of the events.
+    """
+    rising, starts, widths = pulses(timestamps, types)
+    periods = np.diff(rising)
+    stats = {'edges': len(timestamps), 'pulses': len(widths)}
+    for name, values in (('period', periods), ('width', widths)):
+        if len(values):
+            stats[name] = float(values.mean()) / 1000
+            stats[name + 'Min'] = float(values.min()) / 1000
+            stats[name + 'Max'] = float(values.max()) / 1000
+            stats[name + 'Std'] = float(values.std()) / 1000
+        else:
+            stats[name] = stats[name + 'Min'] = stats[name + 'Max'] = stats[name + 'Std'] = 0.0
+    stats['frequency'] = 1000000 / stats['period'] if stats['period'] > 0 else 0.0
+    # Only pulses that start a complete period
+    complete = starts < rising[-1] if len(rising) else starts < 0
+    if len(periods) and np.any(complete):
+        stats['duty'] = float(widths[complete].sum() / (rising[-1] - starts[complete][0]))
+    else:
+        stats['duty'] = 0.0
+    return stats
+
+
+def windows(timestamps, types, windowSecs, stepSecs):
+    """Return windowdtype array with frequency, mean pulse width and duty cycle
+    for windows of windowSecs starting every stepSecs from the first event.
+    Windows are located with searchsorted over cumulative sums, so there's no
+    Python loop over windows or edges.
+    """
+    rising, starts, widths = pulses(timestamps, types)
+    if len(timestamps) == 0:
+        return np.zeros(0, dtype=windowdtype)
+    windowNs = int(windowSecs * 1000000000)
+    stepNs = int(stepSecs * 1000000000)
+    first = int(timestamps[0])
+    last = max(int(timestamps[-1]) - windowNs, first)
+    result = np.zeros((last - first) // stepNs + 1, dtype=windowdtype)
+    begin = first + np.arange(len(result), dtype=np.int64) * stepNs
+    end = begin + windowNs
+    result["start"] = begin
+    result["edges"] = np.searchsorted(timestamps, end) - np.searchsorted(timestamps, begin)
+    # Frequency from first to last rising edge in window
+    lo = np.searchsorted(rising, begin)
+    hi = np.searchsorted(rising, end)
+    count = hi - lo
+    has = count > 1
+    span = rising[hi[has] - 1] - rising[lo[has]]
+    result["frequency"][has] = (count[has] - 1) * 1000000000 / span
+    # Mean width of pulses starting in window
+    total = np.concatenate(([0], np.cumsum(widths)))
+    lo = np.searchsorted(starts, begin)
+    hi = np.searchsorted(starts, end)
+    count = hi - lo
+    has = count > 0
+    result["width"][has] = (total[hi[has]] - total[lo[has]]) / count[has] / 1000
+    result["duty"] = result["width"] * result["frequency"] / 1000000
+    return result
+
+
+class pulsemeter:
+
+    def __init__(self, line, windowSecs=1.0, size=65536):
+        """line must already be requested for edge events. size events are
+        preallocated, enough for windowSecs of edges.
+        """
+        self.events = eventbuffer(line, size=size)
+        self.windowNs = int(windowSecs * 1000000000)
+
+    @property
+    def fullReads(self):
+        return self.events.fullReads
+
+    @property
+    def missed(self):
+        return self.events.missed
+
+    @property
+    def dropped(self):
+        return self.events.dropped
+
+    def update(self, timeout=0):
+        """Drain pending events and discard events older than windowSecs before
+        the newest. Returns number of events read.
+        """
+        # Make room before draining, events that don't fit are dropped
+        self.trim()
+        num = self.events.drain(timeout)
+        self.trim()
+        return num
+
+    def trim(self):
+        """Move events inside the window to the front of the buffer.
+        """
+        events = self.events.events
+        if len(events) == 0:
+            return
+        keep = np.searchsorted(events["timestamp"], events["timestamp"][-1] - self.windowNs)
+        if keep > 0:
+            count = len(events) - keep
+            self.events.buffer[:count] = events[keep:]
+            self.events.count = count
+
+    def stats(self):
+        """Return measure of the current window.
+        """
+        events = self.events.events
+        return measure(events["timestamp"], events["event_type"])
+
+    def windows(self, windowSecs, stepSecs):
+        """Return windows over the current window.
+        """
+        events = self.events.events
+        return windows(events["timestamp"], events["event_type"], windowSecs, stepSecs)
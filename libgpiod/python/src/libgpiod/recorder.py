@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Binary edge event recorder
+-------------
+Capture real edge traffic to a compact append-only file for replayer. The file
+is a 16 byte header followed by 16 byte records of kernel timestamp (ns), line
+offset and event type, so it can be memory mapped and read as an array. write
+takes a lineevent, so a recorder can be registered as a dispatcher handler,
+and readEvent records gpiod_line_event_read results.
+
+rec = recorder.recorder("button.gpev")
+events.register(line, rec.write)
+"""
+
+import struct, threading
+from libgpiod import libgpiod
+from libgpiod.lineevents import lineevent
+
+# File magic and format version
+magic = b"GPEV"
+version = 1
+headerStruct = struct.Struct("=4sII4x")
+# timestamp, offset, event_type
+recordStruct = struct.Struct("=QIB3x")
+
+
+class recorder:
+
+    def __init__(self, fileName, bufferSize=65536):
+        """Open fileName for append, writing the header if it's new.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        self.lock = threading.Lock()
+        self.file = open(fileName, "ab", buffering=bufferSize)
+        if self.file.tell() == 0:
+            self.file.write(headerStruct.pack(magic, version, recordStruct.size))
+        self.event = self.ffi.new("struct gpiod_line_event*")
+        self.count = 0
+
+    def write(self, event):
+        """Append lineevent. Safe to call from several threads.
+        """
+        record = recordStruct.pack(event.timestamp, event.offset, event.event_type)
+        with self.lock:
+            self.file.write(record)
+            self.count += 1
+
+    def writeBatch(self, events):
+        """Append list of lineevents.
+        """
+        records = b"".join([recordStruct.pack(event.timestamp, event.offset, event.event_type) for event in events])
+        with self.lock:
+            self.file.write(records)
+            self.count += len(events)
+
+    def readEvent(self, line):
+        """Read one event with gpiod_line_event_read, record it and return it
+        as a lineevent.
+        """
+        if self.lib.gpiod_line_event_read(line, self.event) != 0:
+            raise RuntimeError("Unable to read event on line %d" % self.lib.gpiod_line_offset(line))
+        event = lineevent(self.lib.gpiod_line_offset(line), self.event.event_type,
+                          self.event.ts.tv_sec * 1000000000 + self.event.ts.tv_nsec)
+        self.write(event)
+        return event
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
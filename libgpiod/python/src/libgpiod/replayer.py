@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Binary edge event replayer
+-------------
+Memory map a recorder file and feed the events back into the same handler
+APIs at the original speed, faster or as fast as possible. This gives a
+reproducible load without any GPIO hardware. Handlers are called with a
+lineevent like dispatcher handlers or, with batchSecs, a list of lineevents
+like eventring batch callbacks and debounce.process.
+
+player = replayer.replayer("button.gpev")
+player.replay(handler, speed=10.0)
+print(player.stats())
+"""
+
+import mmap, os, time
+from libgpiod.lineevents import lineevent
+from libgpiod.recorder import magic, version, headerStruct, recordStruct
+
+
+class replayer:
+
+    def __init__(self, fileName):
+        """Map fileName read only. A partial record at the end (recorder still
+        writing) is ignored.
+        """
+        with open(fileName, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < headerStruct.size:
+                raise RuntimeError("%s is not an event recording" % fileName)
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fileMagic, fileVersion, recordSize = headerStruct.unpack_from(self.map)
+        if fileMagic != magic or fileVersion != version or recordSize != recordStruct.size:
+            self.map.close()
+            raise RuntimeError("%s is not a version %d event recording" % (fileName, version))
+        self.count = (size - headerStruct.size) // recordStruct.size
+        self.played = 0
+        self.elapsed = 0.0
+        self.maxLate = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("Event index out of range")
+        timestamp, offset, eventType = recordStruct.unpack_from(self.map, headerStruct.size + index * recordStruct.size)
+        return lineevent(offset, eventType, timestamp)
+
+    def __iter__(self):
+        return self.events()
+
+    def events(self, start=0, stop=None):
+        """Iterate lineevents from start to stop.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        end = headerStruct.size + stop * recordStruct.size
+        for timestamp, offset, eventType in recordStruct.iter_unpack(memoryview(self.map)[headerStruct.size + start * recordStruct.size:end]):
+            yield lineevent(offset, eventType, timestamp)
+
+    def array(self):
+        """Return records as a read only NumPy structured array without
+        copying. Requires NumPy.
+        """
+        import numpy as np
+        dtype = np.dtype([("timestamp", "u8"), ("offset", "u4"), ("event_type", "u1"), ("pad", "V3")])
+        return np.frombuffer(self.map, dtype=dtype, count=self.count, offset=headerStruct.size)
+
+    def wait(self, deadline):
+        """Sleep until deadline and track lateness.
+        """
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        late = time.perf_counter() - deadline
+        if late > self.maxLate:
+            self.maxLate = late
+
+    def replay(self, handler, speed=1.0, batchSecs=None):
+        """Call handler with each event at its recorded time divided by speed.
+        speed None replays as fast as possible. If batchSecs is not None
+        handler is called with a list of the events due in each batchSecs
+        period at the end of the period instead.
+        """
+        self.played = 0
+        self.maxLate = 0.0
+        start = time.perf_counter()
+        first = self[0].timestamp if self.count else 0
+        scale = 1000000000 * (speed or 1.0)
+        batch = []
+        batchEnd = batchSecs
+        for event in self.events():
+            due = (event.timestamp - first) / scale
+            if batchSecs is None:
+                if speed is not None:
+                    self.wait(start + due)
+                handler(event)
+            else:
+                if due >= batchEnd:
+                    if batch:
+                        if speed is not None:
+                            self.wait(start + batchEnd)
+                        handler(batch)
+                        batch = []
+                    batchEnd = (due // batchSecs + 1) * batchSecs
+                batch.append(event)
+            self.played += 1
+        if batch:
+            if speed is not None:
+                self.wait(start + batchEnd)
+            handler(batch)
+        self.elapsed = time.perf_counter() - start
+
+    def stats(self):
+        """Return dict with events played, events per second, elapsed seconds
+        and max lateness in microseconds of the last replay.
+        """
+        return {'events': self.played,
+                'rate': self.played / self.elapsed if self.elapsed > 0 else 0.0,
+                'elapsed': self.elapsed,
+                'late': self.maxLate * 1000000}
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
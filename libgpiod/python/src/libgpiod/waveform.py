@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Precomputed waveform playback
+-------------
+Play a table of steps on a linebulk of output lines from a dedicated thread.
+Each step is a row of values (one per line) and a time offset in seconds from
+the start of the pass. Values are copied into one C int array up front, so a
+step is a single gpiod_line_set_value_bulk call. Steps are timed against
+absolute deadlines (sleep until just before, then spin) so errors don't add up
+like a loop of time.sleep calls.
+
+values and offsets can be lists or NumPy arrays, i.e. a stepper sequence:
+
+wave = waveform.waveform(bulk, [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]], [0, .002, .004, .006])
+wave.start(repeat=100)
+wave.join()
+print(wave.stats())
+"""
+
+import threading, time
+from array import array
+from libgpiod import libgpiod
+
+
+class waveform:
+
+    def __init__(self, bulk, values, offsets, periodSecs=None, spinSecs=0.0002, lateSecs=0.0001):
+        """bulk is a linebulk already requested as outputs. periodSecs is the
+        length of one pass when repeating, by default the last offset plus the
+        last step interval. A step set more than lateSecs after its deadline
+        is counted as late.
+        """
+        self.gpiod = libgpiod.libgpiod()
+        self.lib = self.gpiod.lib
+        self.ffi = self.gpiod.ffi
+        self.bulk = bulk
+        # Accept NumPy arrays without depending on NumPy
+        values = values.tolist() if hasattr(values, "tolist") else values
+        self.offsets = offsets.tolist() if hasattr(offsets, "tolist") else list(offsets)
+        if len(values) != len(self.offsets):
+            raise RuntimeError("values has %d steps and offsets has %d" % (len(values), len(self.offsets)))
+        if len(self.offsets) == 0:
+            raise RuntimeError("Waveform has no steps")
+        num = len(bulk)
+        self.table = self.ffi.new("int[]", len(values) * num)
+        for step, row in enumerate(values):
+            if len(row) != num:
+                raise RuntimeError("Step %d has %d values for %d lines" % (step, len(row), num))
+            self.table[step * num:(step + 1) * num] = row
+        # Pointer to each step's values
+        self.steps = [self.table + step * num for step in range(len(values))]
+        if periodSecs is None:
+            periodSecs = self.offsets[-1] + (self.offsets[-1] - self.offsets[-2] if len(self.offsets) > 1 else 0)
+        self.periodSecs = periodSecs
+        self.spinSecs = spinSecs
+        self.lateSecs = lateSecs
+        self.thread = None
+        self.running = False
+        self.error = None
+        self.lateness = array('d')
+        self.played = 0
+        self.elapsed = 0.0
+
+    def play(self, repeat):
+        """Runs in playback thread.
+        """
+        setValueBulk = self.lib.gpiod_line_set_value_bulk
+        bulk = self.bulk.bulk
+        clock = time.perf_counter
+        sleep = time.sleep
+        spinSecs = self.spinSecs
+        lateness = self.lateness
+        played = 0
+        start = clock()
+        for count in range(repeat):
+            if not self.running:
+                break
+            base = start + count * self.periodSecs
+            for offset, values in zip(self.offsets, self.steps):
+                if not self.running:
+                    break
+                deadline = base + offset
+                remaining = deadline - clock()
+                if remaining > spinSecs:
+                    sleep(remaining - spinSecs)
+                while clock() < deadline:
+                    pass
+                if setValueBulk(bulk, values) < 0:
+                    self.error = "gpiod_line_set_value_bulk error"
+                    self.running = False
+                    break
+                lateness[played] = clock() - deadline
+                played += 1
+        self.elapsed = clock() - start
+        self.played = played
+        self.running = False
+
+    def start(self, repeat=1):
+        """Start playback thread.
+        """
+        # Lateness of every step, preallocated so playback doesn't allocate
+        self.lateness = array('d', bytes(8 * len(self.offsets) * repeat))
+        self.played = 0
+        self.error = None
+        self.running = True
+        self.thread = threading.Thread(target=self.play, args=(repeat,), daemon=True)
+        self.thread.start()
+
+    def join(self):
+        """Wait for playback to finish.
+        """
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            raise RuntimeError(self.error)
+
+    def stop(self):
+        """Stop playback after the current step.
+        """
+        self.running = False
+        self.join()
+
+    def stats(self):
+        """Return dict with steps played, achieved steps per second, late steps
+        and lateness percentiles in microseconds.
+        """
+        lateness = sorted(self.lateness[:self.played])
+        num = len(lateness)
+
+        def percentile(p):
+            return lateness[min(num - 1, int(p * num))] * 1000000 if num else 0.0
+
+        return {'steps': num,
+                'rate': num / self.elapsed if self.elapsed > 0 else 0.0,
+                'late': sum(1 for value in lateness if value > self.lateSecs),
+                'p50': percentile(.5),
+                'p90': percentile(.9),
+                'p99': percentile(.99),
+                'max': lateness[-1] * 1000000 if num else 0.0}
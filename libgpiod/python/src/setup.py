@@ -1,4 +1,35 @@
 from setuptools import setup
+from setuptools.command.build_ext import build_ext
+from setuptools.errors import CCompilerError, ExecError, PlatformError
+
+
+class optional_build_ext(build_ext):
+    """API mode extensions are optional. If there's no compiler or libgpiod
+    headers the bindings fall back to ABI mode at runtime.
+    """
+
+    def initialize_options(self):
+        build_ext.initialize_options(self)
+        self.failed = []
+
+    def run(self):
+        try:
+            build_ext.run(self)
+        except PlatformError as e:
+            self.warn("Skipping API mode build, using ABI mode: %s" % e)
+
+    def build_extension(self, ext):
+        try:
+            build_ext.build_extension(self, ext)
+        except (CCompilerError, ExecError, PlatformError) as e:
+            self.failed.append(ext.name)
+            self.warn("Unable to build %s, using ABI mode: %s" % (ext.name, e))
+
+    def copy_extensions_to_source(self):
+        # Nothing to copy for extensions that failed to build
+        self.extensions = [ext for ext in self.extensions if ext.name not in self.failed]
+        build_ext.copy_extensions_to_source(self)
+
 
 setup(name='libgpiod',
       version='0.1',
@@ -8,4 +39,8 @@ setup(name='libgpiod',
       author_email='sgjava@gmail.com',
       license='FreeBSD License',
       packages=['libgpiod'],
+      extras_require={'numpy': ['numpy']},
+      setup_requires=["cffi>=1.0.0"],
+      cffi_modules=["libgpiod/build.py:ffibuilder"],
+      cmdclass={'build_ext': optional_build_ext},
       zip_safe=False)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2018 Steven P. Goldsmith
+# See LICENSE.md for details.
+
+"""
+Out-of-line API mode build for libpwmio
+-------------
+setup.py uses this to compile libpwmio._libpwmio from the same cdef used in ABI
+mode. Calls go straight to libpwmio instead of through libffi. You can also
+run python libpwmio/build.py in the src dir to build in place.
+"""
+
+import os, sys
+from cffi import FFI
+
+# Make libpwmio package importable when run by setup.py or directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from libpwmio.libpwmio import cdef
+
+# pwmio.h is part of this project
+src = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../c/src"))
+
+ffibuilder = FFI()
+ffibuilder.set_source("libpwmio._libpwmio", "#include \"pwmio.h\"", include_dirs=[src],
+                      libraries=["pwmio"], library_dirs=["/usr/local/lib"],
+                      runtime_library_dirs=["/usr/local/lib"])
+ffibuilder.cdef(cdef)
+
+if __name__ == "__main__":
+    ffibuilder.compile(verbose=True)
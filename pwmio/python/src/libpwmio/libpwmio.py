@@ -10,16 +10,12 @@ Helper methods added to handle repetitive operations.
 """
 
 import time
+import threading
 from cffi import FFI
 
-
-class libpwmio:
-
-    def __init__(self):
-        self.ffi = FFI()
-        # Specify each C function, struct and constant you want a Python binding for
-        # Copy-n-paste with minor edits
-        self.ffi.cdef("""
+# Specify each C function, struct and constant you want a Python binding for
+# Copy-n-paste with minor edits
+cdef = """
         int pwm_open_device(int device);
 
         int pwm_close_device(int device);
@@ -33,8 +29,46 @@ class libpwmio:
         int pwm_set_period(int device, int pwm, int period);
 
         int pwm_set_duty_cycle(int device, int pwm, int duty_cycle);
-        """)
-        self.lib = self.ffi.dlopen("/usr/local/lib/libpwmio.so")
+        """
+
+# FFI and library shared by every libpwmio instance in the process keyed by api
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load(api=True):
+    """Return the shared FFI and library. The compiled API mode module built by
+    setup.py is used if present, otherwise cdef is parsed and the library is
+    opened in ABI mode. Pass api=False to force ABI mode. Either way this only
+    happens on the first call.
+    """
+    if api not in _loaded:
+        with _lock:
+            # Another thread may have loaded it while we waited
+            if api not in _loaded:
+                loaded = None
+                if api:
+                    try:
+                        from libpwmio._libpwmio import ffi, lib
+                        loaded = (ffi, lib)
+                    except ImportError:
+                        # No compiler when installed, so share ABI mode
+                        loaded = _loaded.get(False)
+                if loaded is None:
+                    ffi = FFI()
+                    ffi.cdef(cdef)
+                    loaded = (ffi, ffi.dlopen("/usr/local/lib/libpwmio.so"))
+                    _loaded[False] = loaded
+                _loaded[api] = loaded
+    return _loaded[api]
+
+
+class libpwmio:
+
+    def __init__(self):
+        """Use shared FFI and library interfaces.
+        """
+        self.ffi, self.lib = load()
 
     def open(self, device, pwm):
         """Open PWM device and return bytes written or error if < 0.